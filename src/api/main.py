@@ -22,7 +22,10 @@ import cv2
 
 # Import des modules internes
 import sys
-sys.path.append("src")
+# Inutile sous pytest (pythonpath = ["src"]) ou en installation éditable
+_SRC_DIR = str(Path(__file__).resolve().parents[1])
+if _SRC_DIR not in sys.path:
+    sys.path.append(_SRC_DIR)
 from ml_pipelines.inference_pipeline import RoadSignInferencePipeline
 
 # Configuration du logging
@@ -196,6 +199,10 @@ async def shutdown_event():
     """Nettoyage à l'arrêt de l'application"""
     logger.info("🛑 Arrêt de l'API Road Sign ML")
     
+    # Arrêt bloquant des pools du pipeline et libération des moteurs OCR
+    if pipeline is not None:
+        pipeline.close()
+    
     # Nettoyage des fichiers temporaires
     temp_dir = Path("temp")
     if temp_dir.exists():
@@ -0,0 +1,69 @@
+"""
+Utilitaires partagés par les pipelines ML
+Chargement des configurations YAML (en cache) et dépendances optionnelles communes.
+"""
+
+import copy
+import functools
+import os
+import re
+from typing import Dict
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader  # Parseur YAML en C (libyaml)
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import tesserocr  # API Tesseract in-process (optionnelle)
+except ImportError:
+    tesserocr = None
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime: float) -> Dict:
+    """Parse la configuration YAML une seule fois par (chemin, date de modification)"""
+    with open(config_path, 'r', encoding='utf-8') as file:
+        return yaml.load(file, Loader=YamlLoader)
+
+
+def load_yaml_config(config_path: str) -> Dict:
+    """
+    Charge une configuration YAML via le cache en mémoire du processus
+    
+    Args:
+        config_path: Chemin du fichier YAML
+        
+    Returns:
+        Dict: Copie profonde de la configuration, modifiable par l'appelant
+    """
+    return copy.deepcopy(_load_config_cached(config_path, os.path.getmtime(config_path)))
+
+
+def tesseract_api_kwargs(tesseract_config: Dict) -> Dict:
+    """
+    Arguments de tesserocr.PyTessBaseAPI tirés de la configuration Tesseract
+    
+    Les options --psm et --oem de la ligne de commande pytesseract sont
+    reportées telles quelles pour que les deux moteurs se comportent pareil.
+    
+    Args:
+        tesseract_config: Section ocr.tesseract de la configuration
+        
+    Returns:
+        Dict: lang, et psm / oem / path s'ils sont configurés
+    """
+    config = tesseract_config.get('config', '')
+    psm = re.search(r'--psm\s+(\d+)', config)
+    oem = re.search(r'--oem\s+(\d+)', config)
+    
+    kwargs = {'lang': tesseract_config.get('lang', 'eng')}
+    if psm:
+        kwargs['psm'] = int(psm.group(1))
+    if oem:
+        kwargs['oem'] = int(oem.group(1))
+    if tesseract_config.get('tessdata_path'):
+        kwargs['path'] = tesseract_config['tessdata_path']
+    
+    return kwargs
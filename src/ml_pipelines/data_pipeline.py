@@ -19,6 +19,8 @@ from PIL import Image
 import numpy as np
 from sklearn.model_selection import train_test_split
 
+from ml_pipelines._config import load_yaml_config
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,8 +49,7 @@ class DataPipeline:
     def _load_config(self, config_path: str) -> Dict:
         """Charge la configuration depuis le fichier YAML"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                return yaml.safe_load(file)
+            return load_yaml_config(config_path)
         except FileNotFoundError:
             logger.error(f"Fichier de configuration non trouvé: {config_path}")
             raise
@@ -3,13 +3,24 @@ Pipeline d'inférence pour la détection et reconnaissance de panneaux routiers
 Ce module combine YOLO (détection) et OCR (reconnaissance texte) pour un pipeline complet.
 """
 
+import atexit
+import copy
+import hashlib
+import io
 import logging
+import os
+import queue
+import re
+import threading
 import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
-import yaml
 
 import mlflow
+from mlflow.entities import Metric
 import numpy as np
 import cv2
 from PIL import Image
@@ -17,45 +28,148 @@ import torch
 from ultralytics import YOLO
 import pytesseract
 
+from ml_pipelines._config import load_yaml_config, tesseract_api_kwargs, tesserocr
+
+try:
+    import xxhash  # Hash rapide pour les clés du cache de prédictions (optionnel)
+except ImportError:
+    xxhash = None
+
+try:
+    from numba import njit  # Compilation JIT des noyaux numériques (optionnelle)
+except ImportError:
+    njit = None
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Caractères spéciaux retirés du texte OCR, compilé une seule fois au chargement
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\-/]')
+
+
+def _pad_clip_boxes(xyxy: np.ndarray, width: int, height: int, pad_ratio: float) -> np.ndarray:
+    """
+    Ajoute le padding ROI à un lot de bboxes et les borne à l'image
+    
+    Args:
+        xyxy: Bboxes de forme (N, 4) au format [x1, y1, x2, y2]
+        width: Largeur de l'image
+        height: Hauteur de l'image
+        pad_ratio: Padding relatif à la taille de chaque bbox
+        
+    Returns:
+        np.ndarray: Bboxes int32 (N, 4) directement utilisables pour le slicing
+    """
+    boxes = xyxy.astype(np.int32)
+    pad_w = ((boxes[:, 2] - boxes[:, 0]) * pad_ratio).astype(np.int32)
+    pad_h = ((boxes[:, 3] - boxes[:, 1]) * pad_ratio).astype(np.int32)
+    
+    padded = np.empty_like(boxes)
+    padded[:, 0] = np.maximum(boxes[:, 0] - pad_w, 0)
+    padded[:, 1] = np.maximum(boxes[:, 1] - pad_h, 0)
+    padded[:, 2] = np.minimum(boxes[:, 2] + pad_w, width)
+    padded[:, 3] = np.minimum(boxes[:, 3] + pad_h, height)
+    return padded
+
+
+if njit is not None:
+    _pad_clip_boxes = njit(cache=True)(_pad_clip_boxes)
+
 
 class RoadSignInferencePipeline:
     """Pipeline d'inférence complet pour la détection et reconnaissance de panneaux routiers"""
     
+    _pad_clip_boxes = staticmethod(_pad_clip_boxes)
+    
     def __init__(self, 
                  yolo_model_path: Optional[str] = None,
-                 config_path: str = "conf/base/model_config.yml"):
+                 config_path: str = "conf/base/model_config.yml",
+                 config_dict: Optional[Dict] = None):
         """
         Initialise le pipeline d'inférence
         
         Args:
             yolo_model_path: Chemin vers le modèle YOLO entraîné
             config_path: Chemin vers le fichier de configuration
+            config_dict: Configuration déjà chargée (prioritaire sur config_path)
         """
-        self.config = self._load_config(config_path)
+        # Ressources (pools, threads, moteurs) libérées par close() ou __del__
+        self._closed = False
+        
+        if config_dict is not None:
+            # Copie profonde, comme pour la configuration lue sur disque
+            self.config = copy.deepcopy(config_dict)
+        else:
+            self.config = self._load_config(config_path)
         self.pipeline_config = self.config['pipeline']
         self.yolo_config = self.config['yolo']
         self.ocr_config = self.config['ocr']
         
+        # Post-processing OCR précompilé (appelé pour chaque détection)
+        postprocess_config = self.ocr_config['postprocessing']
+        self._known_patterns_upper = tuple(
+            pattern.upper() for pattern in postprocess_config.get('known_patterns', [])
+            if isinstance(pattern, str)
+        )
+        
+        # Device et précision d'inférence (FP16 uniquement sur GPU)
+        performance_config = self.pipeline_config['performance']
+        use_cuda = performance_config.get('use_gpu', True) and torch.cuda.is_available()
+        self.device = 0 if use_cuda else 'cpu'
+        self.half = use_cuda and performance_config.get('half_precision', True)
+        self.imgsz = self.yolo_config['model'].get('imgsz', 640)
+        if use_cuda:
+            # Taille d'entrée fixe: cuDNN peut sélectionner ses kernels une seule fois
+            torch.backends.cudnn.benchmark = True
+        
+        # Chaîne de preprocessing OCR via la T-API OpenCV (UMat) si OpenCL est disponible
+        self.use_opencl = (
+            cv2.ocl.haveOpenCL()
+            and self.ocr_config['preprocessing'].get('use_opencl', True)
+        )
+        
         # Initialisation des modèles
         self.yolo_model = None
+        self.tess = None
+        self._thread_local = threading.local()
+        self._tess_engines = []
         self.load_models(yolo_model_path)
         
+        # Pool de threads pour l'OCR des détections d'une même image; chaque worker crée
+        # son moteur tesserocr au démarrage (au plus max_workers moteurs)
+        self._ocr_pool = ThreadPoolExecutor(
+            max_workers=os.cpu_count(),
+            initializer=self._init_ocr_worker, initargs=(weakref.ref(self),)
+        )
+        
+        # Pool de lecture/décodage des images fournies par chemin (préchargement batch)
+        self._loader_pool = ThreadPoolExecutor(max_workers=4)
+        self.imread_flags = self.pipeline_config['performance'].get('imread_flags', 'color')
+        
         # Configuration MLflow pour tracking des prédictions
-        mlflow.set_experiment("RoadSign_E2E_Pipeline")
+        experiment = mlflow.set_experiment("RoadSign_E2E_Pipeline")
+        
+        # Logging MLflow asynchrone: file consommée par un thread dédié qui tient
+        # un run unique, vidée et clôturée à l'arrêt de l'interpréteur
+        self._metric_q = queue.Queue()
+        self._metric_thread = threading.Thread(
+            target=self._metric_worker, args=(self._metric_q, experiment.experiment_id),
+            daemon=True
+        )
+        self._metric_thread.start()
+        atexit.register(self._stop_metric_worker, self._metric_q, self._metric_thread)
         
         # Cache pour optimiser les performances
         self.cache_enabled = self.pipeline_config['performance'].get('enable_cache', True)
-        self.prediction_cache = {} if self.cache_enabled else None
+        self.cache_size = self.pipeline_config['performance'].get('cache_size', 128)
+        self.prediction_cache = OrderedDict() if self.cache_enabled else None
         
     def _load_config(self, config_path: str) -> Dict:
         """Charge la configuration depuis le fichier YAML"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                return yaml.safe_load(file)
+            # Copie profonde: chaque instance peut modifier sa configuration
+            return load_yaml_config(config_path)
         except FileNotFoundError:
             logger.error(f"Fichier de configuration non trouvé: {config_path}")
             raise
@@ -73,20 +187,44 @@ class RoadSignInferencePipeline:
         try:
             # Chargement du modèle YOLO
             if yolo_model_path and Path(yolo_model_path).exists():
-                self.yolo_model = YOLO(yolo_model_path)
+                weights = str(yolo_model_path)
+                self.yolo_model = YOLO(weights)
                 logger.info(f"Modèle YOLO chargé: {yolo_model_path}")
             else:
                 # Modèle par défaut si pas de modèle spécifique
                 architecture = self.yolo_config['model']['architecture']
-                self.yolo_model = YOLO(f"{architecture}.pt")
+                weights = f"{architecture}.pt"
+                self.yolo_model = YOLO(weights)
                 logger.info(f"Modèle YOLO par défaut chargé: {architecture}")
             
+            if self.device != 'cpu':
+                # Moteur TensorRT si possible, sinon poids PyTorch résidents sur GPU
+                engine_model = None
+                if weights.endswith('.pt') and self.yolo_config['model'].get('tensorrt', True):
+                    engine_model = self._load_tensorrt_engine(weights)
+                
+                if engine_model is not None:
+                    self.yolo_model = engine_model
+                else:
+                    self.yolo_model.to('cuda')
+                    if self.half:
+                        self.yolo_model.half()
+            
+            # Moteur Tesseract persistant si tesserocr est disponible
+            if tesserocr is not None:
+                try:
+                    self.tess = self._create_tesseract_api()
+                    logger.info("OCR Tesseract configuré (tesserocr)")
+                except Exception as e:
+                    logger.warning(f"tesserocr indisponible, repli sur pytesseract: {e}")
+            
             # Test OCR
-            try:
-                pytesseract.get_tesseract_version()
-                logger.info("OCR Tesseract configuré")
-            except Exception as e:
-                logger.warning(f"Problème avec Tesseract: {e}")
+            if self.tess is None:
+                try:
+                    pytesseract.get_tesseract_version()
+                    logger.info("OCR Tesseract configuré")
+                except Exception as e:
+                    logger.warning(f"Problème avec Tesseract: {e}")
             
             return True
             
@@ -94,6 +232,161 @@ class RoadSignInferencePipeline:
             logger.error(f"Erreur lors du chargement des modèles: {e}")
             return False
     
+    def _load_tensorrt_engine(self, weights: str):
+        """
+        Charge le moteur TensorRT associé aux poids .pt, en l'exportant au besoin
+        
+        Le moteur est mis en cache à côté des poids, avec la taille d'entrée,
+        le batch maximal et la précision dans son nom.
+        
+        Args:
+            weights: Chemin des poids PyTorch (.pt)
+            
+        Returns:
+            YOLO: Modèle TensorRT, ou None si l'export est impossible
+        """
+        batch_size = self.pipeline_config['performance'].get('max_batch_size', 16)
+        precision = 'fp16' if self.half else 'fp32'
+        weights_path = Path(weights)
+        engine_path = weights_path.with_name(
+            f"{weights_path.stem}_{self.imgsz}_b{batch_size}_{precision}.engine"
+        )
+        
+        try:
+            stale = (
+                engine_path.exists() and weights_path.exists()
+                and engine_path.stat().st_mtime < weights_path.stat().st_mtime
+            )
+            if not engine_path.exists() or stale:
+                logger.info(f"Export TensorRT: {engine_path}")
+                # Profil dynamique (batch 1 à batch_size) pour servir aussi predict_image
+                exported = self.yolo_model.export(
+                    format='engine', half=self.half, imgsz=self.imgsz,
+                    dynamic=True, batch=batch_size, device=self.device
+                )
+                Path(exported).replace(engine_path)
+            
+            engine_model = YOLO(str(engine_path), task='detect')
+            logger.info(f"Moteur TensorRT chargé: {engine_path}")
+            return engine_model
+            
+        except Exception as e:
+            logger.warning(f"TensorRT indisponible, repli sur PyTorch: {e}")
+            return None
+    
+    def _create_tesseract_api(self):
+        """Crée une instance PyTessBaseAPI à partir de la config Tesseract"""
+        return tesserocr.PyTessBaseAPI(**tesseract_api_kwargs(self.ocr_config['tesseract']))
+    
+    @staticmethod
+    def _init_ocr_worker(pipeline_ref: weakref.ref):
+        """
+        Initialise un worker du pool OCR avec son propre moteur tesserocr
+        
+        Référence faible: les threads du pool ne maintiennent pas le pipeline en vie.
+        """
+        pipeline = pipeline_ref()
+        if pipeline is None or pipeline.tess is None:
+            return
+        try:
+            tess = pipeline._create_tesseract_api()
+        except Exception as e:
+            logger.warning(f"Moteur tesserocr du worker OCR indisponible: {e}")
+            return
+        pipeline._thread_local.tess = tess
+        pipeline._tess_engines.append(tess)
+    
+    def _thread_tess(self):
+        """
+        Retourne le moteur tesserocr à utiliser dans le thread courant
+        
+        PyTessBaseAPI n'étant pas thread-safe: moteur propre à chaque worker du pool
+        OCR, moteur principal pour le thread principal, et None (repli pytesseract)
+        pour les autres threads.
+        """
+        tess = getattr(self._thread_local, 'tess', None)
+        if tess is not None:
+            return tess
+        if threading.current_thread() is threading.main_thread():
+            return self.tess
+        return None
+    
+    def _thread_clahe(self):
+        """
+        Retourne l'objet CLAHE du thread courant
+        
+        Créé une seule fois par thread: l'objet OpenCV conserve des buffers
+        internes et ne peut pas être partagé entre les threads du pool OCR.
+        """
+        clahe = getattr(self._thread_local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._thread_local.clahe = clahe
+        return clahe
+    
+    def _thread_h2d_buf(self) -> Optional[torch.Tensor]:
+        """
+        Retourne le buffer hôte en mémoire épinglée du thread courant (GPU seulement)
+        
+        Alloué au premier batch de chaque thread: deux predict_batch concurrents
+        ne remplissent jamais le même buffer pendant une copie asynchrone vers le GPU.
+        """
+        if self.device == 'cpu':
+            return None
+        buf = getattr(self._thread_local, 'h2d_buf', None)
+        if buf is None:
+            max_batch = self.pipeline_config['performance'].get('max_batch_size', 16)
+            buf = torch.empty(
+                (max_batch, 3, self.imgsz, self.imgsz), dtype=torch.uint8, pin_memory=True
+            )
+            self._thread_local.h2d_buf = buf
+        return buf
+    
+    def close(self):
+        """
+        Arrête les pools et le thread de métriques puis libère les moteurs Tesseract
+        
+        Bloquant: attend la fin des tâches OCR en cours avant d'appeler End() sur
+        les moteurs qu'elles utilisent. À appeler explicitement à l'arrêt.
+        """
+        if getattr(self, '_closed', True):
+            return
+        self._closed = True
+        self._shutdown(wait=True)
+        
+        engines = getattr(self, '_tess_engines', [])
+        tess = getattr(self, 'tess', None)
+        for engine in [tess, *engines]:
+            if engine is not None:
+                engine.End()
+    
+    def __del__(self):
+        """
+        Arrêt non bloquant si close() n'a pas été appelé
+        
+        Le finaliseur peut s'exécuter dans un worker du pool OCR: attendre le pool
+        bloquerait ce worker sur lui-même. Les moteurs Tesseract sont alors libérés
+        par tesserocr à leur collecte, une fois les tâches en cours terminées.
+        """
+        if not getattr(self, '_closed', True):
+            self._closed = True
+            self._shutdown(wait=False)
+    
+    def _shutdown(self, wait: bool):
+        """Arrête le thread de métriques et les pools de chargement et d'OCR"""
+        metric_thread = getattr(self, '_metric_thread', None)
+        if metric_thread is not None and metric_thread.is_alive():
+            self._metric_q.put(None)
+        
+        loader_pool = getattr(self, '_loader_pool', None)
+        if loader_pool is not None:
+            loader_pool.shutdown(wait=wait, cancel_futures=True)
+        
+        # Workers OCR arrêtés avant de libérer leurs moteurs
+        ocr_pool = getattr(self, '_ocr_pool', None)
+        if ocr_pool is not None:
+            ocr_pool.shutdown(wait=wait, cancel_futures=True)
+    
     def preprocess_image(self, image: Union[str, np.ndarray, Image.Image]) -> np.ndarray:
         """
         Préprocesse une image pour l'inférence
@@ -104,13 +397,32 @@ class RoadSignInferencePipeline:
         Returns:
             np.ndarray: Image préprocessée
         """
+        return self._prepare_image(image)[0]
+    
+    def _prepare_image(self, image: Union[str, np.ndarray, Image.Image]
+                       ) -> Tuple[np.ndarray, Tuple[int, int, int]]:
+        """
+        Préprocesse une image et retourne aussi les dimensions de l'image source
+        
+        Les dimensions source diffèrent de celles de l'image préprocessée quand le
+        fichier a été décodé à résolution réduite (imread_flags 'reduced_color_2').
+        
+        Args:
+            image: Image (chemin, array numpy ou PIL)
+            
+        Returns:
+            Tuple: Image BGR préprocessée et dimensions (H, W, C) de l'image source
+        """
+        source_shape = None
+        
         # Conversion en array numpy
         if isinstance(image, str):
-            img = cv2.imread(image)
-            if img is None:
-                raise ValueError(f"Impossible de charger l'image: {image}")
+            img, source_shape = self._decode_image(image)
         elif isinstance(image, Image.Image):
-            img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            # Vue RGB -> BGR puis une seule copie contiguë
+            img = np.ascontiguousarray(np.asarray(image)[..., ::-1])
         else:
             img = image.copy()
         
@@ -118,8 +430,91 @@ class RoadSignInferencePipeline:
         if img is None or img.size == 0:
             raise ValueError("Image invalide ou vide")
         
+        img = self._as_bgr(img)
+        return img, source_shape or img.shape
+    
+    @staticmethod
+    def _as_bgr(img: np.ndarray) -> np.ndarray:
+        """
+        Ramène une image à 3 canaux BGR (niveaux de gris étendus, alpha retiré)
+        
+        Raises:
+            ValueError: Si le nombre de dimensions ou de canaux n'est pas supporté
+        """
+        if img.ndim == 2 or (img.ndim == 3 and img.shape[2] == 1):
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if img.ndim == 3 and img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        if img.ndim != 3 or img.shape[2] != 3:
+            raise ValueError(f"Format d'image non supporté: {img.shape}")
         return img
     
+    def _load_image(self, path: str) -> np.ndarray:
+        """
+        Lit et décode une image depuis le disque
+        
+        Args:
+            path: Chemin de l'image
+            
+        Returns:
+            np.ndarray: Image BGR (éventuellement à résolution réduite)
+        """
+        return self._decode_image(path)[0]
+    
+    def _decode_image(self, path: str) -> Tuple[np.ndarray, Tuple[int, int, int]]:
+        """
+        Lit et décode une image depuis le disque
+        
+        Avec imread_flags 'reduced_color_2', le décodage se fait à demi-résolution
+        quand l'image reste au moins deux fois plus grande que imgsz.
+        
+        Args:
+            path: Chemin de l'image
+            
+        Returns:
+            Tuple: Image BGR et dimensions (H, W, C) de l'image source
+        """
+        try:
+            buf = Path(path).read_bytes()
+        except OSError:
+            raise ValueError(f"Impossible de charger l'image: {path}")
+        
+        flags = cv2.IMREAD_COLOR
+        source_shape = None
+        if self.imread_flags == 'reduced_color_2':
+            try:
+                # Lecture de l'en-tête seulement pour connaître la résolution source
+                with Image.open(io.BytesIO(buf)) as header:
+                    if max(header.size) >= 2 * self.imgsz:
+                        flags = cv2.IMREAD_REDUCED_COLOR_2
+                        width, height = header.size
+                        source_shape = (height, width, 3)
+            except Exception:
+                pass
+        
+        img = cv2.imdecode(np.frombuffer(buf, np.uint8), flags)
+        if img is None:
+            raise ValueError(f"Impossible de charger l'image: {path}")
+        
+        return img, source_shape or img.shape
+    
+    @staticmethod
+    def _to_source_coords(results: List[Dict], image_shape: Tuple[int, int, int],
+                          source_shape: Tuple[int, int, int]):
+        """Ramène en place les bbox des détections aux coordonnées de l'image source"""
+        if tuple(image_shape[:2]) == tuple(source_shape[:2]):
+            return
+        
+        sy = source_shape[0] / image_shape[0]
+        sx = source_shape[1] / image_shape[1]
+        for result in results:
+            x1, y1, x2, y2 = result['bbox']
+            result['bbox'] = [
+                int(x1 * sx), int(y1 * sy),
+                min(int(round(x2 * sx)), source_shape[1]),
+                min(int(round(y2 * sy)), source_shape[0])
+            ]
+    
     def detect_road_signs(self, image: np.ndarray) -> List[Dict]:
         """
         Détecte les panneaux routiers dans l'image
@@ -133,65 +528,163 @@ class RoadSignInferencePipeline:
         if self.yolo_model is None:
             raise ValueError("Modèle YOLO non chargé")
         
-        # Configuration des seuils
-        conf_threshold = self.pipeline_config['confidence_thresholds']['detection_min']
-        nms_threshold = self.pipeline_config['confidence_thresholds']['detection_nms']
-        
         # Inférence YOLO
-        results = self.yolo_model(
-            image, 
-            conf=conf_threshold,
-            iou=nms_threshold,
-            verbose=False
-        )
+        results = self.yolo_model(image, **self._inference_kwargs())
         
         detections = []
-        
         for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Extraction des informations de la bbox
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-                    
-                    # Validation de la détection
-                    if self._validate_detection(x1, y1, x2, y2, image.shape):
-                        detections.append({
-                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                            'confidence': confidence,
-                            'class_id': class_id,
-                            'class_name': self.yolo_model.names.get(class_id, f"class_{class_id}")
-                        })
+            detections.extend(self._parse_detections(result, image.shape))
         
         logger.info(f"Détecté {len(detections)} panneaux")
         return detections
     
-    def _validate_detection(self, x1: float, y1: float, x2: float, y2: float, 
-                          image_shape: Tuple[int, int, int]) -> bool:
-        """Valide une détection selon les critères configurés"""
-        h, w = image_shape[:2]
+    def _inference_kwargs(self) -> Dict:
+        """Arguments communs des appels d'inférence YOLO"""
+        thresholds = self.pipeline_config['confidence_thresholds']
+        return {
+            'conf': thresholds['detection_min'],
+            'iou': thresholds['detection_nms'],
+            'imgsz': self.imgsz,
+            'half': self.half,
+            'device': self.device,
+            'verbose': False
+        }
+    
+    @staticmethod
+    def _letterbox(img: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """
+        Redimensionne l'image dans un carré size x size en conservant le ratio
         
-        # Vérification des coordonnées
-        if x1 < 0 or y1 < 0 or x2 > w or y2 > h or x1 >= x2 or y1 >= y2:
-            return False
+        Args:
+            img: Image source
+            size: Côté du carré de sortie
+            
+        Returns:
+            Tuple: Image paddée, facteur d'échelle et padding (padx, pady)
+        """
+        h, w = img.shape[:2]
+        scale = min(size / h, size / w)
+        new_w, new_h = int(round(w * scale)), int(round(h * scale))
         
-        # Vérification de l'aire minimale
-        area = (x2 - x1) * (y2 - y1)
-        min_area = self.pipeline_config['roi']['min_area']
-        if area < min_area:
-            return False
+        resized = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        padx, pady = (size - new_w) // 2, (size - new_h) // 2
+        padded = cv2.copyMakeBorder(
+            resized, pady, size - new_h - pady, padx, size - new_w - padx,
+            cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        )
+        return padded, scale, (padx, pady)
+    
+    def _batch_tensor(self, imgs: List[np.ndarray]) -> Tuple[torch.Tensor, List[Tuple]]:
+        """
+        Construit un tenseur (B, 3, imgsz, imgsz) unique à partir d'images de tailles variées
+        
+        Args:
+            imgs: Images BGR du lot
+            
+        Returns:
+            Tuple: Tenseur normalisé RGB et (scale, (padx, pady)) de chaque image
+        """
+        shape = (len(imgs), 3, self.imgsz, self.imgsz)
+        # Buffer épinglé propre au thread (transfert hôte -> GPU asynchrone)
+        h2d_buf = self._thread_h2d_buf()
+        if h2d_buf is not None and len(imgs) <= len(h2d_buf):
+            host = h2d_buf[:len(imgs)]
+        else:
+            host = torch.empty(shape, dtype=torch.uint8)
+        
+        letterbox_params = []
+        for k, img in enumerate(imgs):
+            padded, scale, pad = self._letterbox(img, self.imgsz)
+            # BGR -> RGB: Ultralytics considère les tenseurs comme déjà en RGB
+            rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+            host[k].copy_(torch.from_numpy(rgb).permute(2, 0, 1))
+            letterbox_params.append((scale, pad))
+        
+        # Copie unique du lot vers le GPU, conversion et normalisation côté device
+        tensor = host.to('cuda', non_blocking=True) if self.device != 'cpu' else host
+        tensor = tensor.half() if self.half else tensor.float()
+        tensor.div_(255.0)
+        
+        return tensor, letterbox_params
+    
+    def _parse_detections(self, result, image_shape: Tuple[int, int, int],
+                          letterbox: Optional[Tuple] = None) -> List[Dict]:
+        """
+        Convertit un résultat YOLO (une image) en liste de détections validées
+        
+        Args:
+            result: Objet Results Ultralytics d'une seule image
+            image_shape: Dimensions de l'image source
+            letterbox: (scale, (padx, pady)) si l'inférence a été faite sur l'image letterboxée
+            
+        Returns:
+            List[Dict]: Détections avec bboxes et confiances
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        
+        # Extraction vectorisée de toutes les bboxes du résultat
+        xyxy = boxes.xyxy.cpu().numpy()
+        confidences = boxes.conf.cpu().numpy()
+        class_ids = boxes.cls.cpu().numpy().astype(int)
+        
+        # Retour aux coordonnées de l'image source, sans bornage: une bbox hors de
+        # l'image est rejetée par la validation, comme sur le chemin image unique
+        if letterbox is not None:
+            scale, (padx, pady) = letterbox
+            xyxy = (xyxy - np.array([padx, pady, padx, pady], dtype=xyxy.dtype)) / scale
+        
+        # Validation en une seule passe NumPy
+        valid_mask = self._validate_detections(xyxy, image_shape)
         
-        # Vérification du ratio d'aspect
-        width = x2 - x1
-        height = y2 - y1
-        aspect_ratio = width / height if height > 0 else float('inf')
+        detections = []
+        for i in np.flatnonzero(valid_mask):
+            x1, y1, x2, y2 = xyxy[i]
+            class_id = int(class_ids[i])
+            detections.append({
+                'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                'confidence': float(confidences[i]),
+                'class_id': class_id,
+                'class_name': self.yolo_model.names.get(class_id, f"class_{class_id}")
+            })
+        
+        return detections
+    
+    def _validate_detections(self, xyxy: np.ndarray, 
+                             image_shape: Tuple[int, int, int]) -> np.ndarray:
+        """
+        Valide un lot de détections selon les critères configurés
+        
+        Args:
+            xyxy: Bboxes de forme (N, 4) au format [x1, y1, x2, y2]
+            image_shape: Dimensions de l'image source
+            
+        Returns:
+            np.ndarray: Masque booléen (N,) des détections valides
+        """
+        h, w = image_shape[:2]
+        min_area = self.pipeline_config['roi']['min_area']
         max_aspect_ratio = self.pipeline_config['roi']['max_aspect_ratio']
-        if aspect_ratio > max_aspect_ratio:
-            return False
         
-        return True
+        width = xyxy[:, 2] - xyxy[:, 0]
+        height = xyxy[:, 3] - xyxy[:, 1]
+        area = width * height
+        with np.errstate(divide='ignore', invalid='ignore'):
+            aspect_ratio = np.where(height > 0, width / height, np.inf)
+        
+        return (
+            (xyxy[:, 0] >= 0) & (xyxy[:, 1] >= 0) & (xyxy[:, 2] <= w) & (xyxy[:, 3] <= h)
+            & (width > 0) & (height > 0)
+            & (area >= min_area)
+            & (aspect_ratio <= max_aspect_ratio)
+        )
+    
+    def _validate_detection(self, x1: float, y1: float, x2: float, y2: float, 
+                          image_shape: Tuple[int, int, int]) -> bool:
+        """Valide une détection selon les critères configurés"""
+        xyxy = np.array([[x1, y1, x2, y2]], dtype=np.float64)
+        return bool(self._validate_detections(xyxy, image_shape)[0])
     
     def extract_roi(self, image: np.ndarray, bbox: List[int]) -> np.ndarray:
         """
@@ -204,20 +697,11 @@ class RoadSignInferencePipeline:
         Returns:
             np.ndarray: ROI extraite
         """
-        x1, y1, x2, y2 = bbox
-        
-        # Ajout de padding si configuré
+        # Ajout de padding (configuré) et bornage à l'image
         padding_ratio = self.pipeline_config['roi']['padding_ratio']
-        if padding_ratio > 0:
-            width = x2 - x1
-            height = y2 - y1
-            pad_w = int(width * padding_ratio)
-            pad_h = int(height * padding_ratio)
-            
-            x1 = max(0, x1 - pad_w)
-            y1 = max(0, y1 - pad_h)
-            x2 = min(image.shape[1], x2 + pad_w)
-            y2 = min(image.shape[0], y2 + pad_h)
+        x1, y1, x2, y2 = self._pad_clip_boxes(
+            np.asarray([bbox], dtype=np.float64), image.shape[1], image.shape[0], padding_ratio
+        )[0]
         
         roi = image[y1:y2, x1:x2]
         return roi
@@ -232,53 +716,72 @@ class RoadSignInferencePipeline:
         Returns:
             np.ndarray: ROI préprocessée pour OCR
         """
-        preprocessed = roi.copy()
-        
         # Configuration preprocessing
         preprocess_config = self.ocr_config['preprocessing']
         
-        # Conversion en niveaux de gris
-        if len(preprocessed.shape) == 3:
-            preprocessed = cv2.cvtColor(preprocessed, cv2.COLOR_BGR2GRAY)
+        # Mode minimal: Tesseract travaille directement sur la ROI en niveaux de gris
+        if preprocess_config.get('mode', 'full') == 'minimal':
+            if roi.ndim == 3:
+                return cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+            return roi.copy()
+        
+        # Conversion en niveaux de gris: cvtColor alloue déjà le buffer de travail,
+        # les étapes suivantes le modifient en place quand OpenCV le permet.
+        # Avec OpenCL, toute la chaîne travaille sur un UMat (une seule copie retour)
+        src = cv2.UMat(roi) if self.use_opencl else roi
+        if roi.ndim == 3:
+            preprocessed = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY)
+        elif self.use_opencl:
+            preprocessed = src
+        else:
+            # ROI déjà en gris: copie pour ne pas modifier l'image de l'appelant
+            preprocessed = roi.copy()
         
-        # Débruitage
+        # Débruitage: flou gaussien par défaut, NLM (beaucoup plus lent) sur demande
         if preprocess_config.get('denoise', False):
-            preprocessed = cv2.fastNlMeansDenoising(preprocessed)
+            if preprocess_config.get('denoise_method', 'gaussian') == 'nlm':
+                preprocessed = cv2.fastNlMeansDenoising(preprocessed)
+            else:
+                cv2.GaussianBlur(preprocessed, (5, 5), 0, dst=preprocessed)
         
         # Amélioration du contraste
         if preprocess_config.get('contrast_enhancement', False):
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            preprocessed = clahe.apply(preprocessed)
+            preprocessed = self._thread_clahe().apply(preprocessed)
         
         # Ajustement de la luminosité
         if preprocess_config.get('brightness_adjustment', False):
             # Ajustement automatique basé sur l'histogramme
-            mean_brightness = np.mean(preprocessed)
+            mean_brightness = cv2.mean(preprocessed)[0]
             if mean_brightness < 100:  # Image sombre
-                preprocessed = cv2.convertScaleAbs(preprocessed, alpha=1.2, beta=30)
+                cv2.convertScaleAbs(preprocessed, dst=preprocessed, alpha=1.2, beta=30)
         
         # Redimensionnement pour optimiser l'OCR
         min_height = preprocess_config.get('min_height', 32)
-        current_height = preprocessed.shape[0]
+        current_height, current_width = roi.shape[:2]
         
         if current_height < min_height:
             scale_factor = min_height / current_height
-            new_width = int(preprocessed.shape[1] * scale_factor)
+            new_width = int(current_width * scale_factor)
+            # Bicubique seulement pour les forts agrandissements, bilinéaire sinon
+            interpolation = cv2.INTER_CUBIC if scale_factor > 2 else cv2.INTER_LINEAR
             preprocessed = cv2.resize(preprocessed, (new_width, min_height), 
-                                    interpolation=cv2.INTER_CUBIC)
+                                    interpolation=interpolation)
         
-        # Binarisation
+        # Binarisation (en place)
         threshold_method = preprocess_config.get('threshold_method', 'adaptive')
         if threshold_method == 'adaptive':
-            preprocessed = cv2.adaptiveThreshold(
+            cv2.adaptiveThreshold(
                 preprocessed, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 2
+                cv2.THRESH_BINARY, 11, 2, dst=preprocessed
             )
         elif threshold_method == 'otsu':
-            _, preprocessed = cv2.threshold(
-                preprocessed, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+            cv2.threshold(
+                preprocessed, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                dst=preprocessed
             )
         
+        if isinstance(preprocessed, cv2.UMat):
+            return preprocessed.get()
         return preprocessed
     
     def recognize_text(self, roi: np.ndarray) -> Dict[str, Union[str, float]]:
@@ -297,26 +800,32 @@ class RoadSignInferencePipeline:
             config = tesseract_config['config']
             
             # OCR avec données détaillées
-            data = pytesseract.image_to_data(
-                roi, 
-                config=config,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # Extraction du texte et calcul de confiance
-            text_parts = []
-            confidences = []
+            tess = self._thread_tess()
+            if tess is not None:
+                # Moteur déjà chargé: pas de sous-processus ni de fichier temporaire
+                tess.SetImage(Image.fromarray(roi))
+                words = tess.MapWordConfidences()
+                data = {
+                    'text': [word for word, _ in words],
+                    'conf': [conf for _, conf in words]
+                }
+            else:
+                data = pytesseract.image_to_data(
+                    roi, 
+                    config=config,
+                    output_type=pytesseract.Output.DICT
+                )
             
-            for i, word in enumerate(data['text']):
-                if word.strip():  # Ignore les mots vides
-                    conf = int(data['conf'][i])
-                    if conf > 0:  # Ignore les mots avec confiance nulle
-                        text_parts.append(word.strip())
-                        confidences.append(conf)
+            # Extraction du texte et calcul de confiance (vectorisés)
+            words = np.char.strip(np.asarray(data['text'], dtype=str))
+            confs = np.asarray(data['conf'], dtype=np.float64).astype(np.int32)
+            # Ignore les mots vides et les mots avec confiance nulle
+            mask = (np.char.str_len(words) > 0) & (confs > 0)
+            text_parts = words[mask].tolist()
             
             # Assemblage du résultat
-            text = ' '.join(text_parts) if text_parts else ""
-            avg_confidence = np.mean(confidences) / 100.0 if confidences else 0.0
+            text = ' '.join(text_parts)
+            avg_confidence = float(confs[mask].mean()) / 100.0 if mask.any() else 0.0
             
             # Post-processing
             processed_text = self._postprocess_text(text)
@@ -349,23 +858,17 @@ class RoadSignInferencePipeline:
         
         # Suppression des caractères spéciaux si configuré
         if postprocess_config.get('remove_special_chars', False):
-            import re
-            processed = re.sub(r'[^\w\s-/]', '', processed)
+            processed = _SPECIAL_CHARS_RE.sub('', processed)
         
-        # Nettoyage des espaces
-        processed = ' '.join(processed.split())
-        
-        # Mise en majuscules pour panneaux (optionnel)
-        processed = processed.upper()
+        # Nettoyage des espaces et mise en majuscules pour panneaux
+        processed_upper = ' '.join(processed.split()).upper()
         
         # Vérification contre les patterns connus
-        known_patterns = postprocess_config.get('known_patterns', [])
-        for pattern in known_patterns:
-            if isinstance(pattern, str):
-                if pattern.upper() in processed.upper():
-                    return pattern.upper()
+        for pattern in self._known_patterns_upper:
+            if pattern in processed_upper:
+                return pattern
         
-        return processed
+        return processed_upper
     
     def predict_image(self, image: Union[str, np.ndarray, Image.Image]) -> Dict:
         """
@@ -381,82 +884,233 @@ class RoadSignInferencePipeline:
         
         try:
             # Préprocessing
-            img = self.preprocess_image(image)
-            
-            # Détection des panneaux
-            detections = self.detect_road_signs(img)
-            
-            # OCR sur chaque détection
-            results = []
-            for detection in detections:
-                # Extraction ROI
-                roi = self.extract_roi(img, detection['bbox'])
-                
-                # Preprocessing OCR
-                roi_processed = self.preprocess_roi_for_ocr(roi)
-                
-                # Reconnaissance texte
-                ocr_result = self.recognize_text(roi_processed)
-                
-                # Combinaison des résultats
-                combined_result = {
-                    **detection,
-                    'ocr': ocr_result,
-                    'has_text': len(ocr_result['text']) > 0
-                }
-                
-                results.append(combined_result)
-            
-            # Calcul du temps total
-            total_time = time.time() - start_time
-            
-            # Résultat final
-            final_result = {
-                'image_shape': img.shape,
-                'detections_count': len(detections),
-                'results': results,
-                'processing_time': total_time,
-                'pipeline_version': "1.0.0"
-            }
-            
-            # Log MLflow pour monitoring
-            self._log_prediction_metrics(final_result)
-            
-            logger.info(f"Prédiction terminée en {total_time:.3f}s - {len(detections)} détections")
-            return final_result
+            img, source_shape = self._prepare_image(image)
+            return self._predict_prepared(img, source_shape, start_time)
             
         except Exception as e:
             logger.error(f"Erreur lors de la prédiction: {e}")
-            return {
-                'error': str(e),
-                'detections_count': 0,
-                'results': [],
-                'processing_time': time.time() - start_time
-            }
+            return self._error_result(e, start_time)
+    
+    def _predict_prepared(self, img: np.ndarray, source_shape: Tuple[int, int, int],
+                          start_time: float) -> Dict:
+        """
+        Détection + OCR sur une image déjà préprocessée
+        
+        Args:
+            img: Image BGR préprocessée
+            source_shape: Dimensions de l'image source (bbox et image_shape y sont ramenées)
+            start_time: Début de la prédiction, pour processing_time
+            
+        Returns:
+            Dict: Résultats complets avec détections et textes
+        """
+        # Image déjà analysée: réponse directe depuis le cache LRU
+        cache_key = (
+            self._cache_key(img) + (tuple(source_shape),) if self.cache_enabled else None
+        )
+        if cache_key is not None and cache_key in self.prediction_cache:
+            self.prediction_cache.move_to_end(cache_key)
+            logger.info("Prédiction servie depuis le cache")
+            # Copie profonde: l'appelant ne partage pas les listes du cache
+            cached = copy.deepcopy(self.prediction_cache[cache_key])
+            cached['processing_time'] = 0.0
+            return cached
+        
+        # Détection des panneaux
+        detections = self.detect_road_signs(img)
+        
+        # OCR sur chaque détection
+        results = self._process_detections(img, detections)
+        
+        # Calcul du temps total
+        total_time = time.time() - start_time
+        
+        # Résultat final, dans les coordonnées de l'image source
+        self._to_source_coords(results, img.shape, source_shape)
+        final_result = {
+            'image_shape': tuple(source_shape),
+            'detections_count': len(detections),
+            'results': results,
+            'processing_time': total_time,
+            'pipeline_version': "1.0.0"
+        }
+        
+        # Log MLflow pour monitoring
+        self._log_prediction_metrics(final_result)
+        
+        if cache_key is not None:
+            self._cache_store(cache_key, final_result)
+        
+        logger.info(f"Prédiction terminée en {total_time:.3f}s - {len(detections)} détections")
+        return final_result
+    
+    @staticmethod
+    def _cache_key(img: np.ndarray) -> Tuple:
+        """Clé de cache: dimensions + hash de l'image complète (un détail fin suffit à distinguer)"""
+        buffer = np.ascontiguousarray(img)
+        if xxhash is not None:
+            digest = xxhash.xxh3_64(buffer).intdigest()
+        else:
+            digest = hashlib.blake2b(buffer, digest_size=8).hexdigest()
+        return img.shape, img.dtype.str, digest
+    
+    def _cache_store(self, key: Tuple, result: Dict):
+        """Ajoute un résultat au cache en évinçant l'entrée la moins récente"""
+        # Copie profonde: le résultat renvoyé à l'appelant reste indépendant du cache
+        self.prediction_cache[key] = copy.deepcopy(result)
+        self.prediction_cache.move_to_end(key)
+        if len(self.prediction_cache) > self.cache_size:
+            self.prediction_cache.popitem(last=False)
+    
+    def _process_detections(self, img: np.ndarray, detections: List[Dict]) -> List[Dict]:
+        """
+        Applique ROI → preprocessing → OCR sur chaque détection d'une image
+        
+        Les détections sont traitées en parallèle: Tesseract libère le GIL
+        pendant la reconnaissance.
+        
+        Args:
+            img: Image source (BGR)
+            detections: Détections issues de YOLO
+            
+        Returns:
+            List[Dict]: Détections enrichies du résultat OCR, dans l'ordre d'entrée
+        """
+        if not detections:
+            return []
+        
+        # Padding + bornage de toutes les ROI en un seul appel
+        roi_boxes = self._pad_clip_boxes(
+            np.asarray([detection['bbox'] for detection in detections], dtype=np.float64),
+            img.shape[1], img.shape[0], self.pipeline_config['roi']['padding_ratio']
+        )
+        
+        # ROI trop petites pour un OCR exploitable: résultat vide sans passer par Tesseract
+        roi_areas = (roi_boxes[:, 2] - roi_boxes[:, 0]) * (roi_boxes[:, 3] - roi_boxes[:, 1])
+        ocr_mask = roi_areas >= self.ocr_config.get('min_ocr_area', 400)
+        
+        futures = [
+            self._ocr_pool.submit(self._process_one_detection, img, detection, roi_box)
+            if run_ocr else None
+            for detection, roi_box, run_ocr in zip(detections, roi_boxes, ocr_mask)
+        ]
+        return [
+            future.result() if future is not None else self._skip_ocr(detection)
+            for detection, future in zip(detections, futures)
+        ]
+    
+    @staticmethod
+    def _skip_ocr(detection: Dict) -> Dict:
+        """Détection sans OCR (ROI sous le seuil min_ocr_area)"""
+        return {
+            **detection,
+            'ocr': {'text': "", 'confidence': 0.0, 'raw_text': "", 'word_count': 0},
+            'has_text': False
+        }
+    
+    def _process_one_detection(self, img: np.ndarray, detection: Dict, 
+                               roi_box: np.ndarray) -> Dict:
+        """Preprocessing et OCR d'une détection à partir de sa ROI déjà bornée"""
+        # Extraction ROI (vue sur l'image, sans copie)
+        x1, y1, x2, y2 = roi_box
+        roi = img[y1:y2, x1:x2]
+        
+        # Preprocessing OCR
+        roi_processed = self.preprocess_roi_for_ocr(roi)
+        
+        # Reconnaissance texte
+        ocr_result = self.recognize_text(roi_processed)
+        
+        # Combinaison des résultats
+        return {
+            **detection,
+            'ocr': ocr_result,
+            'has_text': len(ocr_result['text']) > 0
+        }
     
     def _log_prediction_metrics(self, result: Dict):
-        """Log les métriques de prédiction dans MLflow"""
-        try:
-            with mlflow.start_run(run_name="inference_prediction"):
-                mlflow.log_metric("detections_count", result['detections_count'])
-                mlflow.log_metric("processing_time", result['processing_time'])
-                
-                # Métriques OCR moyennes
-                if result['results']:
-                    avg_ocr_confidence = np.mean([
-                        r['ocr']['confidence'] for r in result['results'] 
-                        if r['ocr']['confidence'] > 0
+        """
+        Met en file les métriques de prédiction pour MLflow
+        
+        L'envoi (appels HTTP) est fait par un thread d'arrière-plan afin de
+        ne pas allonger le temps de réponse de la prédiction.
+        """
+        metrics = {
+            'detections_count': result['detections_count'],
+            'processing_time': result['processing_time']
+        }
+        
+        # Métriques OCR moyennes
+        ocr_confidences = [
+            r['ocr']['confidence'] for r in result['results']
+            if r['ocr']['confidence'] > 0
+        ]
+        if ocr_confidences:
+            metrics['avg_ocr_confidence'] = float(np.mean(ocr_confidences))
+        
+        # Performance check
+        target_time = 2.0  # 2 secondes cible
+        metrics['meets_performance_target'] = int(result['processing_time'] <= target_time)
+        
+        self._metric_q.put(metrics)
+    
+    @staticmethod
+    def _metric_worker(metric_q: queue.Queue, experiment_id: str):
+        """
+        Envoie les métriques en file à MLflow, par rafales, jusqu'à réception de None
+        
+        Un seul run couvre toute la durée de vie du pipeline, chaque prédiction
+        étant un step. Le client MLflow est utilisé avec un run_id explicite:
+        le run actif de l'API fluent est propre à chaque thread.
+        """
+        client = None
+        run_id = None
+        step = 0
+        while True:
+            # Attente du premier élément puis récupération de tout ce qui est en attente
+            batch = [metric_q.get()]
+            while True:
+                try:
+                    batch.append(metric_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            metrics_batch = [metrics for metrics in batch if metrics is not None]
+            try:
+                if metrics_batch:
+                    if run_id is None:
+                        client = mlflow.MlflowClient()
+                        run = client.create_run(experiment_id, run_name="inference_pipeline")
+                        run_id = run.info.run_id
+                    
+                    timestamp = int(time.time() * 1000)
+                    client.log_batch(run_id, metrics=[
+                        Metric(key, float(value), timestamp, step + offset)
+                        for offset, metrics in enumerate(metrics_batch)
+                        for key, value in metrics.items()
                     ])
-                    if not np.isnan(avg_ocr_confidence):
-                        mlflow.log_metric("avg_ocr_confidence", avg_ocr_confidence)
-                
-                # Performance check
-                target_time = 2.0  # 2 secondes cible
-                mlflow.log_metric("meets_performance_target", 
-                                int(result['processing_time'] <= target_time))
-                
-        except Exception as e:
-            logger.warning(f"Impossible de logger les métriques: {e}")
+                    step += len(metrics_batch)
+            except Exception as e:
+                logger.warning(f"Impossible de logger les métriques: {e}")
+            finally:
+                for _ in batch:
+                    metric_q.task_done()
+            
+            if len(metrics_batch) < len(batch):
+                # Arrêt demandé: clôture du run
+                if run_id is not None:
+                    try:
+                        client.set_terminated(run_id)
+                    except Exception as e:
+                        logger.warning(f"Impossible de clôturer le run MLflow: {e}")
+                return
+    
+    @staticmethod
+    def _stop_metric_worker(metric_q: queue.Queue, metric_thread: threading.Thread):
+        """Vide la file de métriques et arrête le thread de logging (appelé à la sortie)"""
+        if metric_thread.is_alive():
+            metric_q.put(None)
+            metric_thread.join()
     
     def predict_batch(self, images: List[Union[str, np.ndarray, Image.Image]]) -> List[Dict]:
         """
@@ -470,13 +1124,115 @@ class RoadSignInferencePipeline:
         """
         logger.info(f"Traitement batch de {len(images)} images")
         
+        batch_size = self.pipeline_config['performance'].get('max_batch_size', 16)
+        
+        # Les chemins sont lus et décodés en avance dans le pool de chargement:
+        # le lot suivant se charge pendant le traitement du lot courant
+        items = list(images)
+        prefetched = 0
+        
         results = []
-        for i, image in enumerate(images):
-            logger.info(f"Traitement image {i+1}/{len(images)}")
-            result = self.predict_image(image)
-            results.append(result)
+        for start in range(0, len(items), batch_size):
+            prefetch_end = min(start + 2 * batch_size, len(items))
+            for j in range(prefetched, prefetch_end):
+                if isinstance(items[j], str):
+                    items[j] = self._loader_pool.submit(self._decode_image, items[j])
+            prefetched = max(prefetched, prefetch_end)
+            
+            chunk = items[start:start + batch_size]
+            logger.info(f"Traitement images {start + 1}-{start + len(chunk)}/{len(images)}")
+            results.extend(self._predict_chunk(chunk))
         
         return results
+    
+    def _predict_chunk(self, images: List[Union[str, np.ndarray, Image.Image, Future]]) -> List[Dict]:
+        """
+        Prédiction sur un lot d'images avec une seule inférence YOLO
+        
+        Args:
+            images: Lot d'images (taille <= max_batch_size), éventuellement en cours de chargement
+            
+        Returns:
+            List[Dict]: Résultats pour chaque image, dans l'ordre d'entrée
+        """
+        start_time = time.time()
+        outputs: List[Optional[Dict]] = [None] * len(images)
+        
+        # Préprocessing: les images invalides sont écartées du batch
+        imgs = []
+        source_shapes = []
+        indices = []
+        for i, image in enumerate(images):
+            try:
+                if isinstance(image, Future):
+                    # Image déjà décodée par le pool de chargement
+                    img, source_shape = image.result()
+                    img = self._as_bgr(img)
+                else:
+                    img, source_shape = self._prepare_image(image)
+                imgs.append(img)
+                source_shapes.append(source_shape)
+                indices.append(i)
+            except Exception as e:
+                logger.error(f"Erreur lors de la prédiction: {e}")
+                outputs[i] = self._error_result(e, start_time)
+        
+        if imgs:
+            try:
+                if self.yolo_model is None:
+                    raise ValueError("Modèle YOLO non chargé")
+                
+                # Inférence YOLO unique sur tout le lot, letterboxé en un seul tenseur
+                batch, letterbox_params = self._batch_tensor(imgs)
+                yolo_results = self.yolo_model(batch, **self._inference_kwargs())
+                if len(yolo_results) != len(imgs):
+                    raise ValueError(
+                        f"YOLO a renvoyé {len(yolo_results)} résultats pour {len(imgs)} images"
+                    )
+                
+                # Temps de détection réparti équitablement entre les images
+                detection_time = (time.time() - start_time) / len(imgs)
+                
+                for i, img, source_shape, yolo_result, letterbox in zip(
+                        indices, imgs, source_shapes, yolo_results, letterbox_params):
+                    ocr_start = time.time()
+                    detections = self._parse_detections(yolo_result, img.shape, letterbox)
+                    results = self._process_detections(img, detections)
+                    self._to_source_coords(results, img.shape, source_shape)
+                    
+                    final_result = {
+                        'image_shape': tuple(source_shape),
+                        'detections_count': len(detections),
+                        'results': results,
+                        'processing_time': detection_time + time.time() - ocr_start,
+                        'pipeline_version': "1.0.0"
+                    }
+                    self._log_prediction_metrics(final_result)
+                    outputs[i] = final_result
+                    
+            except Exception as e:
+                # Repli image par image: seule l'image fautive renvoie une erreur
+                logger.warning(f"Échec de la prédiction batch, repli image par image: {e}")
+                for i, img, source_shape in zip(indices, imgs, source_shapes):
+                    if outputs[i] is None:
+                        image_start = time.time()
+                        try:
+                            outputs[i] = self._predict_prepared(img, source_shape, image_start)
+                        except Exception as image_error:
+                            logger.error(f"Erreur lors de la prédiction: {image_error}")
+                            outputs[i] = self._error_result(image_error, image_start)
+        
+        return outputs
+    
+    @staticmethod
+    def _error_result(error: Exception, start_time: float) -> Dict:
+        """Construit le résultat renvoyé en cas d'échec de prédiction"""
+        return {
+            'error': str(error),
+            'detections_count': 0,
+            'results': [],
+            'processing_time': time.time() - start_time
+        }
 
 
 def main():
@@ -3,8 +3,11 @@ Pipeline d'entraînement pour les modèles YOLO et OCR
 Ce module gère l'entraînement, la validation et la sauvegarde des modèles.
 """
 
+import functools
 import logging
 import os
+import queue
+import threading
 import time
 from pathlib import Path
 from typing import Dict, Optional, Tuple
@@ -12,17 +15,89 @@ import yaml
 
 import mlflow
 import mlflow.pytorch
+from mlflow import MlflowClient
+from mlflow.entities import Metric, Param
+from packaging.version import Version
 from ultralytics import YOLO
+from ultralytics.cfg import DEFAULT_CFG_DICT
 import torch
 import numpy as np
 from PIL import Image
 import cv2
 
+from ml_pipelines._config import load_yaml_config, tesseract_api_kwargs, tesserocr
+
+try:
+    from apex.optimizers import FusedAdam, FusedSGD  # Optimiseurs fusionnés NVIDIA (optionnels)
+except ImportError:
+    FusedAdam = FusedSGD = None
+
+try:
+    import psutil  # Mémoire disponible pour le cache d'images (optionnel)
+except ImportError:
+    psutil = None
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Classes GTSRB simplifiées (German Traffic Sign Recognition Benchmark)
+GTSRB_CLASS_NAMES: Tuple[str, ...] = (
+    "Speed limit (20km/h)", "Speed limit (30km/h)", "Speed limit (50km/h)",
+    "Speed limit (60km/h)", "Speed limit (70km/h)", "Speed limit (80km/h)",
+    "End of speed limit (80km/h)", "Speed limit (100km/h)", "Speed limit (120km/h)",
+    "No passing", "No passing veh over 3.5 tons", "Right-of-way at intersection",
+    "Priority road", "Yield", "Stop", "No vehicles", "Veh > 3.5 tons prohibited",
+    "No entry", "General caution", "Dangerous curve left", "Dangerous curve right",
+    "Double curve", "Bumpy road", "Slippery road", "Road narrows on the right",
+    "Road work", "Traffic signals", "Pedestrians", "Children crossing",
+    "Bicycles crossing", "Beware of ice/snow", "Wild animals crossing",
+    "End speed + passing limits", "Turn right ahead", "Turn left ahead",
+    "Ahead only", "Go straight or right", "Go straight or left",
+    "Keep right", "Keep left", "Roundabout mandatory", "End of no passing",
+    "End no passing veh > 3.5 tons"
+)
+
+# Correspondance métrique exportée -> clé des résultats Ultralytics
+TRAINING_METRIC_KEYS: Tuple[Tuple[str, str], ...] = (
+    ('map50', 'metrics/mAP50(B)'),
+    ('map50_95', 'metrics/mAP50-95(B)'),
+    ('precision', 'metrics/precision(B)'),
+    ('recall', 'metrics/recall(B)'),
+    ('train_loss', 'train/box_loss'),
+    ('val_loss', 'val/box_loss')
+)
+
+
+def _f1_score(precision: float, recall: float) -> float:
+    """F1-score, nul si la précision ou le rappel est nul"""
+    if precision > 0 and recall > 0:
+        return 2.0 * precision * recall / (precision + recall)
+    return 0.0
+
+
+@functools.lru_cache(maxsize=1)
+def _stop_test_image() -> np.ndarray:
+    """Image de test "STOP" (construite une seule fois, en lecture seule)"""
+    image = np.full((100, 300, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "STOP", (50, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+    image.flags.writeable = False
+    return image
+
+
+def _log_batch(metrics: Optional[Dict[str, float]] = None, params: Optional[Dict] = None,
+               run_id: Optional[str] = None):
+    """Envoie métriques et paramètres d'un run MLflow (par défaut le run actif) en une requête"""
+    timestamp = int(time.time() * 1000)
+    MlflowClient().log_batch(
+        run_id=run_id or mlflow.active_run().info.run_id,
+        metrics=[Metric(key, float(value), timestamp, 0) for key, value in (metrics or {}).items()],
+        params=[Param(key, str(value)) for key, value in (params or {}).items()],
+        tags=[]
+    )
+
+
 class YOLOTrainingPipeline:
     """Pipeline d'entraînement pour le modèle YOLO de détection de panneaux"""
     
@@ -44,11 +119,40 @@ class YOLOTrainingPipeline:
         self.data_yaml_path = None
         self.model = None
         
+        # Logging MLflow hors du thread d'entraînement: file de tâches consommée
+        # par un thread dédié, vidée avant la clôture de chaque run
+        self._log_queue = queue.Queue()
+        threading.Thread(target=self._log_worker, args=(self._log_queue,), daemon=True).start()
+    
+    def __del__(self):
+        """Arrête le thread de logging MLflow"""
+        log_queue = getattr(self, '_log_queue', None)
+        if log_queue is not None:
+            log_queue.put(None)
+    
+    @staticmethod
+    def _log_worker(log_queue: queue.Queue):
+        """Exécute les tâches de logging MLflow en file jusqu'à réception de None"""
+        while True:
+            task = log_queue.get()
+            try:
+                if task is None:
+                    return
+                func, args, kwargs = task
+                func(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Échec du logging MLflow: {e}")
+            finally:
+                log_queue.task_done()
+    
+    def _log_async(self, func, *args, **kwargs):
+        """Met en file un appel de logging MLflow pour le thread dédié"""
+        self._log_queue.put((func, args, kwargs))
+        
     def _load_config(self, config_path: str) -> Dict:
         """Charge la configuration depuis le fichier YAML"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                return yaml.safe_load(file)
+            return load_yaml_config(config_path)
         except FileNotFoundError:
             logger.error(f"Fichier de configuration non trouvé: {config_path}")
             raise
@@ -78,22 +182,8 @@ class YOLOTrainingPipeline:
     
     def _get_class_names(self) -> list:
         """Retourne la liste des noms de classes"""
-        # Pour l'exemple, utilisons les classes GTSRB simplifiées
-        return [
-            "Speed limit (20km/h)", "Speed limit (30km/h)", "Speed limit (50km/h)",
-            "Speed limit (60km/h)", "Speed limit (70km/h)", "Speed limit (80km/h)",
-            "End of speed limit (80km/h)", "Speed limit (100km/h)", "Speed limit (120km/h)",
-            "No passing", "No passing veh over 3.5 tons", "Right-of-way at intersection",
-            "Priority road", "Yield", "Stop", "No vehicles", "Veh > 3.5 tons prohibited",
-            "No entry", "General caution", "Dangerous curve left", "Dangerous curve right",
-            "Double curve", "Bumpy road", "Slippery road", "Road narrows on the right",
-            "Road work", "Traffic signals", "Pedestrians", "Children crossing",
-            "Bicycles crossing", "Beware of ice/snow", "Wild animals crossing",
-            "End speed + passing limits", "Turn right ahead", "Turn left ahead",
-            "Ahead only", "Go straight or right", "Go straight or left",
-            "Keep right", "Keep left", "Roundabout mandatory", "End of no passing",
-            "End no passing veh > 3.5 tons"
-        ]
+        # Copie en liste: yaml.dump écrirait un tuple avec un tag Python
+        return list(GTSRB_CLASS_NAMES)
     
     def initialize_model(self) -> YOLO:
         """
@@ -117,17 +207,22 @@ class YOLOTrainingPipeline:
         
         return model
     
-    def train_model(self, resume: bool = False) -> Dict[str, float]:
+    def train_model(self, resume: bool = False, compile_model: bool = True,
+                    cache_mode: str = "ram") -> Dict[str, float]:
         """
         Entraîne le modèle YOLO
         
         Args:
             resume: Reprendre un entraînement précédent
+            compile_model: Compiler le modèle avec torch.compile (GPU, PyTorch >= 2.1)
+            cache_mode: Cache des images décodées: "ram", "disk" ou "" (désactivé)
             
         Returns:
             Dict[str, float]: Métriques d'entraînement
         """
-        with mlflow.start_run(run_name=f"yolo_training_{int(time.time())}"):
+        with mlflow.start_run(run_name=f"yolo_training_{int(time.time())}") as run:
+            # Le run actif de l'API fluent est propre au thread: run_id explicite
+            run_id = run.info.run_id
             try:
                 logger.info("=== DÉBUT DE L'ENTRAÎNEMENT YOLO ===")
                 
@@ -140,15 +235,67 @@ class YOLOTrainingPipeline:
                 # Configuration d'entraînement
                 training_config = self.yolo_config['training']
                 
-                # Log des paramètres MLflow
-                mlflow.log_params({
+                # cuDNN: sélection des algorithmes une fois par forme d'entrée;
+                # TF32 pour les matmuls et convolutions FP32 (Ampere et plus récents)
+                fast_cuda = torch.cuda.is_available()
+                if fast_cuda:
+                    torch.backends.cudnn.benchmark = True
+                    torch.backends.cuda.matmul.allow_tf32 = True
+                    torch.backends.cudnn.allow_tf32 = True
+                    torch.set_float32_matmul_precision('high')
+                
+                # torch.compile (Inductor) seulement sur GPU avec PyTorch >= 2.1;
+                # Ultralytics repasse en mode eager si la compilation échoue
+                # (clé "compile" absente des versions d'Ultralytics antérieures à 8.3)
+                use_compile = (
+                    compile_model
+                    and torch.cuda.is_available()
+                    and Version(torch.__version__) >= Version("2.1")
+                    and "compile" in DEFAULT_CFG_DICT
+                )
+                if use_compile:
+                    # Cache Inductor persistant: pas de recompilation d'un run à l'autre
+                    os.environ.setdefault(
+                        "TORCHINDUCTOR_CACHE_DIR", str(Path.home() / ".cache" / "torchinductor")
+                    )
+                
+                # Précision mixte + channels_last: convolutions NHWC sur Tensor Cores
+                amp = training_config.get('amp', True)
+                memory_format = "contiguous"
+                if torch.cuda.is_available():
+                    self.model.add_callback("on_train_start", self._to_channels_last)
+                    memory_format = "channels_last"
+                
+                # Adaptation au matériel: GPU visibles, workers du dataloader, batch auto
+                device, workers, batch = self._hardware_settings(training_config)
+                
+                # Cache des images décodées: évite le décodage JPEG à chaque epoch
+                cache_mode = self._select_cache_mode(cache_mode, training_config['img_size'])
+                
+                # Optimiseur apex fusionné (un seul kernel CUDA par step) si disponible
+                fused_optimizer = FusedAdam is not None and torch.cuda.is_available()
+                if fused_optimizer:
+                    self.model.add_callback("on_train_start", self._use_fused_optimizer)
+                
+                # Log des paramètres MLflow (asynchrone)
+                self._log_async(_log_batch, run_id=run_id, params={
                     "architecture": self.yolo_config['model']['architecture'],
                     "epochs": training_config['epochs'],
-                    "batch_size": training_config['batch_size'],
+                    "batch_size": batch,
+                    "workers": workers,
                     "img_size": training_config['img_size'],
                     "lr0": training_config['lr0'],
                     "optimizer": training_config['optimizer'],
-                    "augment": training_config['augment']
+                    "augment": training_config['augment'],
+                    "close_mosaic": training_config.get('close_mosaic', 10),
+                    "copy_paste": training_config.get('copy_paste', 0.0),
+                    "compile": use_compile,
+                    "amp": amp,
+                    "memory_format": memory_format,
+                    "fused_optimizer": fused_optimizer,
+                    "cache": cache_mode,
+                    "cudnn_benchmark": fast_cuda,
+                    "tf32": fast_cuda
                 })
                 
                 # Entraînement
@@ -156,7 +303,8 @@ class YOLOTrainingPipeline:
                 results = self.model.train(
                     data=self.data_yaml_path,
                     epochs=training_config['epochs'],
-                    batch=training_config['batch_size'],
+                    batch=batch,
+                    workers=workers,
                     imgsz=training_config['img_size'],
                     lr0=training_config['lr0'],
                     lrf=training_config['lrf'],
@@ -174,24 +322,29 @@ class YOLOTrainingPipeline:
                     fliplr=training_config['fliplr'],
                     mosaic=training_config['mosaic'],
                     mixup=training_config['mixup'],
+                    close_mosaic=training_config.get('close_mosaic', 10),
+                    copy_paste=training_config.get('copy_paste', 0.0),
                     save_period=training_config.get('save_period', 10),
                     resume=resume,
-                    device=0 if torch.cuda.is_available() else 'cpu'
+                    amp=amp,
+                    cache=cache_mode or False,
+                    device=device,
+                    # Clé transmise seulement si activée: inconnue des anciennes versions
+                    **({'compile': True} if use_compile else {})
                 )
                 
                 # Extraction des métriques finales
                 metrics = self._extract_training_metrics(results)
                 
                 # Log des métriques MLflow
-                for metric_name, metric_value in metrics.items():
-                    mlflow.log_metric(metric_name, metric_value)
+                self._log_async(_log_batch, run_id=run_id, metrics=metrics)
                 
                 # Sauvegarde du modèle
                 model_path = self._save_model()
-                mlflow.log_artifact(model_path, "models")
+                self._log_async(MlflowClient().log_artifact, run_id, model_path, "models")
                 
                 # Log des courbes d'entraînement
-                self._log_training_plots()
+                self._log_async(self._log_training_plots, run_id)
                 
                 logger.info("=== ENTRAÎNEMENT YOLO TERMINÉ ===")
                 logger.info(f"Métriques finales: {metrics}")
@@ -202,6 +355,116 @@ class YOLOTrainingPipeline:
                 logger.error(f"Erreur durant l'entraînement: {e}")
                 mlflow.log_param("error_message", str(e))
                 raise
+                
+            finally:
+                # Tous les logs en file sont envoyés avant la clôture du run
+                self._log_queue.join()
+    
+    def _hardware_settings(self, training_config: Dict) -> Tuple:
+        """
+        Détermine device, workers et batch d'entraînement selon le matériel
+        
+        Args:
+            training_config: Configuration d'entraînement YOLO
+            
+        Returns:
+            Tuple: (device, workers, batch) à passer à model.train
+        """
+        gpu_count = torch.cuda.device_count() if torch.cuda.is_available() else 0
+        if gpu_count > 1:
+            device = list(range(gpu_count))  # DDP multi-GPU
+        else:
+            device = 0 if gpu_count == 1 else 'cpu'
+        
+        # Workers par GPU bornés par la configuration
+        workers = min(
+            training_config.get('workers', 8),
+            max(2, (os.cpu_count() or 1) // max(1, gpu_count))
+        )
+        
+        # Batch -1: Ultralytics sonde la VRAM pour choisir le plus grand batch possible
+        batch = training_config['batch_size']
+        if batch in (None, "auto", -1):
+            batch = -1
+            if gpu_count > 1:
+                logger.warning("Batch automatique non supporté en multi-GPU, batch=16")
+                batch = 16
+        
+        return device, workers, batch
+    
+    def _select_cache_mode(self, cache_mode: str, img_size: int) -> str:
+        """
+        Passe du cache RAM au cache disque si la mémoire disponible ne suffit pas
+        
+        Args:
+            cache_mode: Mode demandé ("ram", "disk" ou "")
+            img_size: Taille des images d'entraînement
+            
+        Returns:
+            str: Mode de cache retenu
+        """
+        if cache_mode != "ram" or psutil is None:
+            return cache_mode
+        
+        # Estimation: images d'entraînement redimensionnées en uint8 BGR
+        train_dir = Path('data/02_processed/train/images')
+        n_images = sum(1 for _ in train_dir.iterdir()) if train_dir.exists() else 0
+        estimated_bytes = n_images * img_size * img_size * 3
+        
+        available = psutil.virtual_memory().available
+        if available < estimated_bytes:
+            logger.warning(
+                f"RAM insuffisante pour le cache ({estimated_bytes / 1e9:.1f} Go requis, "
+                f"{available / 1e9:.1f} Go disponibles), cache sur disque"
+            )
+            return "disk"
+        
+        return cache_mode
+    
+    @staticmethod
+    def _to_channels_last(trainer):
+        """
+        Callback Ultralytics: passe le modèle entraîné en channels_last
+        
+        Appliqué au début de l'entraînement car le trainer reconstruit son propre
+        modèle; la conversion se fait en place et l'optimiseur reste valide.
+        """
+        trainer.model.to(memory_format=torch.channels_last)
+    
+    @staticmethod
+    def _use_fused_optimizer(trainer):
+        """
+        Callback Ultralytics: remplace l'optimiseur torch par son équivalent apex
+        
+        Les groupes de paramètres et hyperparamètres sont repris de l'optimiseur
+        construit par Ultralytics, puis le scheduler est reconstruit dessus. Un
+        entraînement repris garde son optimiseur (et son état) d'origine.
+        """
+        optimizer = trainer.optimizer
+        if trainer.start_epoch > 0:
+            return
+        
+        groups = [
+            {'params': group['params'], 'lr': group['lr'], 'weight_decay': group['weight_decay']}
+            for group in optimizer.param_groups
+        ]
+        defaults = optimizer.param_groups[0]
+        
+        if type(optimizer) is torch.optim.SGD:
+            fused = FusedSGD(groups, lr=defaults['lr'], momentum=defaults['momentum'],
+                             nesterov=defaults['nesterov'])
+        elif type(optimizer) in (torch.optim.Adam, torch.optim.AdamW):
+            fused = FusedAdam(groups, lr=defaults['lr'], betas=defaults['betas'],
+                              eps=defaults['eps'],
+                              adam_w_mode=type(optimizer) is torch.optim.AdamW)
+        else:
+            logger.info(f"Pas d'équivalent apex pour {type(optimizer).__name__}")
+            return
+        
+        trainer.optimizer = fused
+        trainer._setup_scheduler()
+        trainer.scheduler.last_epoch = trainer.start_epoch - 1
+        logger.info(f"Optimiseur apex utilisé: {type(fused).__name__}")
     
     def _extract_training_metrics(self, results) -> Dict[str, float]:
         """Extrait les métriques d'entraînement"""
@@ -215,17 +478,12 @@ class YOLOTrainingPipeline:
             
             # Extraction des métriques principales
             metrics = {
-                'map50': float(metrics_dict.get('metrics/mAP50(B)', 0.0)),
-                'map50_95': float(metrics_dict.get('metrics/mAP50-95(B)', 0.0)),
-                'precision': float(metrics_dict.get('metrics/precision(B)', 0.0)),
-                'recall': float(metrics_dict.get('metrics/recall(B)', 0.0)),
-                'train_loss': float(metrics_dict.get('train/box_loss', 0.0)),
-                'val_loss': float(metrics_dict.get('val/box_loss', 0.0))
+                name: float(metrics_dict.get(key, 0.0)) for name, key in TRAINING_METRIC_KEYS
             }
             
             # Calcul F1-score si précision et rappel disponibles
             if metrics['precision'] > 0 and metrics['recall'] > 0:
-                metrics['f1_score'] = 2 * (metrics['precision'] * metrics['recall']) / (metrics['precision'] + metrics['recall'])
+                metrics['f1_score'] = _f1_score(metrics['precision'], metrics['recall'])
             
             return metrics
             
@@ -248,36 +506,52 @@ class YOLOTrainingPipeline:
         model_name = f"yolo_road_signs_{timestamp}.pt"
         model_path = models_dir / model_name
         
-        # Sauvegarde du modèle
+        # Sauvegarde des poids avant l'export ONNX: l'export modifie le modèle
+        # (fusion, eval, half), les deux opérations restent séquentielles.
+        # FP16 seulement sur GPU: ignoré par l'export ONNX sur CPU.
+        # simplify désactivé explicitement (activé par défaut dans les Ultralytics
+        # récents): il installerait onnxslim via pip pendant l'entraînement
+        img_size = self.yolo_config['training']['img_size']
         self.model.save(str(model_path))
+        exported_path = self.model.export(
+            format='onnx', imgsz=img_size,
+            half=torch.cuda.is_available(), dynamic=False, simplify=False
+        )
         
-        # Sauvegarde également au format ONNX pour l'inférence
-        onnx_path = models_dir / f"yolo_road_signs_{timestamp}.onnx"
-        self.model.export(format='onnx', save_dir=str(models_dir))
+        # L'export est écrit à côté des poids d'origine: déplacement dans models_dir
+        onnx_path = Path(exported_path).replace(models_dir / f"yolo_road_signs_{timestamp}.onnx")
         
         logger.info(f"Modèle sauvegardé: {model_path}")
         logger.info(f"Modèle ONNX sauvegardé: {onnx_path}")
         
         return str(model_path)
     
-    def _log_training_plots(self):
-        """Log les graphiques d'entraînement dans MLflow"""
+    def _log_training_plots(self, run_id: str):
+        """Log les graphiques d'entraînement dans le run MLflow donné"""
         try:
+            client = MlflowClient()
+            
             # Les plots YOLO sont généralement sauvés dans runs/detect/train
             runs_dir = Path("runs/detect")
             if runs_dir.exists():
-                latest_run = max(runs_dir.iterdir(), key=os.path.getctime)
+                # scandir: un seul stat (mis en cache) par entrée
+                with os.scandir(runs_dir) as entries:
+                    latest_run = max(
+                        (entry for entry in entries if entry.is_dir()),
+                        key=lambda entry: entry.stat().st_ctime
+                    ).path
                 
-                # Log des plots s'ils existent
+                # Log des plots s'ils existent (un seul listing du dossier)
                 plots_to_log = [
                     "results.png", "confusion_matrix.png", 
                     "F1_curve.png", "P_curve.png", "R_curve.png", "PR_curve.png"
                 ]
+                present = set(os.listdir(latest_run))
                 
                 for plot_name in plots_to_log:
-                    plot_path = latest_run / plot_name
-                    if plot_path.exists():
-                        mlflow.log_artifact(str(plot_path), "training_plots")
+                    if plot_name in present:
+                        plot_path = os.path.join(latest_run, plot_name)
+                        client.log_artifact(run_id, plot_path, "training_plots")
                         logger.info(f"Plot loggé: {plot_name}")
         
         except Exception as e:
@@ -318,14 +592,22 @@ class OCRTrainingPipeline:
         self.config = self._load_config(config_path)
         self.ocr_config = self.config['ocr']
         
+        # Moteur tesserocr persistant, créé par setup_tesseract
+        self._tess = None
+        
         # Configuration MLflow
         mlflow.set_experiment("RoadSign_OCR_Recognition")
     
+    def __del__(self):
+        """Libère le moteur Tesseract persistant"""
+        tess = getattr(self, '_tess', None)
+        if tess is not None:
+            tess.End()
+    
     def _load_config(self, config_path: str) -> Dict:
         """Charge la configuration depuis le fichier YAML"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                return yaml.safe_load(file)
+            return load_yaml_config(config_path)
         except FileNotFoundError:
             logger.error(f"Fichier de configuration non trouvé: {config_path}")
             raise
@@ -339,15 +621,20 @@ class OCRTrainingPipeline:
         """
         with mlflow.start_run(run_name="tesseract_setup"):
             try:
-                import pytesseract
-                
-                # Test de Tesseract
-                version = pytesseract.get_tesseract_version()
-                logger.info(f"Tesseract version: {version}")
-                
                 # Configuration Tesseract
                 tesseract_config = self.ocr_config['tesseract']
                 
+                # Test de Tesseract: moteur in-process si tesserocr est disponible
+                if tesserocr is not None:
+                    if self._tess is None:
+                        # Mêmes --psm / --oem que le chemin pytesseract et l'inférence
+                        self._tess = tesserocr.PyTessBaseAPI(**tesseract_api_kwargs(tesseract_config))
+                    version = tesserocr.tesseract_version()
+                else:
+                    import pytesseract
+                    version = pytesseract.get_tesseract_version()
+                logger.info(f"Tesseract version: {version}")
+                
                 # Log des paramètres
                 mlflow.log_param("tesseract_version", str(version))
                 mlflow.log_param("languages", tesseract_config['lang'])
@@ -368,15 +655,17 @@ class OCRTrainingPipeline:
     def _test_ocr_accuracy(self) -> float:
         """Test la précision OCR sur des images d'exemple"""
         try:
-            import pytesseract
-            
-            # Création d'une image de test simple
-            test_image = np.ones((100, 300, 3), dtype=np.uint8) * 255
-            cv2.putText(test_image, "STOP", (50, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+            # Image de test simple (mise en cache au niveau du module)
+            test_image = _stop_test_image()
             
-            # OCR
-            config = self.ocr_config['tesseract']['config']
-            text = pytesseract.image_to_string(test_image, config=config).strip()
+            # OCR: moteur in-process (pas de sous-processus ni d'encodage PNG)
+            if self._tess is not None:
+                self._tess.SetImage(Image.fromarray(cv2.cvtColor(test_image, cv2.COLOR_BGR2RGB)))
+                text = self._tess.GetUTF8Text().strip()
+            else:
+                import pytesseract
+                config = self.ocr_config['tesseract']['config']
+                text = pytesseract.image_to_string(test_image, config=config).strip()
             
             # Test de précision simple
             expected = "STOP"
@@ -408,19 +697,24 @@ class OCRTrainingPipeline:
             
             best_config = None
             best_score = 0.0
+            metrics = {}
+            params = {}
             
+            # Évaluation séquentielle: un pool de processus coûterait bien plus que
+            # ces quelques scores et hériterait des threads MLflow au fork
             for i, config in enumerate(preprocessing_configs):
                 score = self._test_preprocessing_config(config)
-                mlflow.log_metric(f"config_{i}_score", score)
-                mlflow.log_params({f"config_{i}_{k}": v for k, v in config.items()})
+                metrics[f"config_{i}_score"] = score
+                params.update({f"config_{i}_{k}": v for k, v in config.items()})
                 
                 if score > best_score:
                     best_score = score
                     best_config = config
             
-            # Log de la meilleure configuration
-            mlflow.log_params({f"best_{k}": v for k, v in best_config.items()})
-            mlflow.log_metric("best_score", best_score)
+            # Log de toutes les configurations et de la meilleure en une requête
+            params.update({f"best_{k}": v for k, v in best_config.items()})
+            metrics["best_score"] = best_score
+            _log_batch(metrics=metrics, params=params)
             
             logger.info(f"Meilleure configuration: {best_config} (score: {best_score})")
             return {"best_score": best_score, "config": best_config}
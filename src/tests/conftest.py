@@ -0,0 +1,16 @@
+"""
+Configuration partagée des tests
+"""
+
+import os
+
+# Un seul thread pour les bibliothèques natives: sur des images de test
+# minuscules, réveiller un pool de threads coûte plus cher que le calcul.
+# Ces variables doivent être posées avant l'import de numpy/cv2.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+import cv2
+
+cv2.setNumThreads(1)
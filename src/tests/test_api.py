@@ -6,36 +6,80 @@ import pytest
 import tempfile
 import io
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, create_autospec
 import numpy as np
-from PIL import Image
+import cv2
 
 from fastapi.testclient import TestClient
-import sys
-sys.path.append("src")
 from api.main import app, initialize_pipeline, process_uploaded_file
+from ml_pipelines.inference_pipeline import RoadSignInferencePipeline
 
 
-# Client de test FastAPI
-client = TestClient(app)
+@pytest.fixture(scope="session")
+def client():
+    """Client de test FastAPI partagé, portail anyio ouvert une seule fois"""
+    with pytest.MonkeyPatch.context() as mp:
+        # Pas de chargement du vrai modèle au démarrage : chaque test installe son pipeline
+        mp.setattr('api.main.initialize_pipeline', lambda: False)
+        with TestClient(app) as c:
+            mp.undo()
+            yield c
+
+
+@pytest.fixture(scope="session")
+def health_response(client):
+    """Réponse de /health récupérée une seule fois pour les vérifications de schéma"""
+    return client.get("/health")
+
+
+# Image JPEG rouge 100x100 encodée une seule fois, partagée par tous les tests
+_JPEG_BYTES = cv2.imencode('.jpg', np.full((100, 100, 3), (0, 0, 255), np.uint8))[1].tobytes()
+
+
+def _file_tuple():
+    """Fichier image de test pour upload, passé en octets bruts à httpx"""
+    return ("test.jpg", _JPEG_BYTES, "image/jpeg")
+
+
+@pytest.fixture
+def mock_pipeline(monkeypatch):
+    """Pipeline autospec propre au test, installé comme pipeline global de l'API"""
+    pipeline_mock = create_autospec(RoadSignInferencePipeline, instance=True)
+    monkeypatch.setattr('api.main.pipeline', pipeline_mock)
+    return pipeline_mock
+
+
+@pytest.fixture
+def isolated_pipeline(monkeypatch):
+    """Part d'un pipeline global vide et restaure sa valeur d'origine après le test"""
+    monkeypatch.setattr('api.main.pipeline', None)
+    yield
+    # monkeypatch remet la valeur d'origine, y compris si initialize_pipeline l'a remplacée
+
+
+@pytest.fixture
+def patched_pipeline_class(monkeypatch):
+    """Remplace directement la classe du pipeline dans l'API, sans décorateur patch"""
+    pipeline_class = Mock(return_value=Mock())
+    monkeypatch.setattr('api.main.RoadSignInferencePipeline', pipeline_class)
+    return pipeline_class
 
 
 class TestAPIEndpoints:
     """Tests pour les endpoints de l'API"""
     
-    def test_root_endpoint(self):
+    def test_root_endpoint(self, client):
         """Test de l'endpoint racine"""
         response = client.get("/")
         assert response.status_code == 200
         assert "Road Sign ML API" in response.text
         assert "text/html" in response.headers["content-type"]
     
-    def test_health_endpoint(self):
+    def test_health_endpoint(self, health_response):
         """Test de l'endpoint health"""
-        response = client.get("/health")
-        assert response.status_code == 200
+        assert health_response.status_code == 200
         
-        data = response.json()
+        data = health_response.json()
         assert "status" in data
         assert "pipeline_loaded" in data
         assert "uptime" in data
@@ -46,7 +90,7 @@ class TestAPIEndpoints:
         assert isinstance(data["uptime"], float)
         assert isinstance(data["total_predictions"], int)
     
-    def test_metrics_endpoint(self):
+    def test_metrics_endpoint(self, client):
         """Test de l'endpoint metrics"""
         response = client.get("/metrics")
         assert response.status_code == 200
@@ -62,7 +106,7 @@ class TestAPIEndpoints:
         assert isinstance(data["total_detections"], int)
         assert isinstance(data["average_processing_time"], float)
     
-    def test_docs_endpoint(self):
+    def test_docs_endpoint(self, client):
         """Test de l'endpoint de documentation"""
         response = client.get("/docs")
         assert response.status_code == 200
@@ -72,13 +116,9 @@ class TestAPIEndpoints:
 class TestImageProcessing:
     """Tests pour le traitement d'images"""
     
-    def create_test_image(self, format="JPEG", size=(100, 100), color="red"):
+    def create_test_image(self):
         """Crée une image de test en mémoire"""
-        img = Image.new('RGB', size, color=color)
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format=format)
-        img_bytes.seek(0)
-        return img_bytes
+        return io.BytesIO(_JPEG_BYTES)
     
     def test_process_uploaded_file_valid_image(self):
         """Test du traitement d'un fichier image valide"""
@@ -162,22 +202,13 @@ class TestPredictionEndpoints:
             'pipeline_version': '1.0.0'
         }
     
-    def create_test_image_file(self):
-        """Crée un fichier image de test pour upload"""
-        img = Image.new('RGB', (100, 100), color='red')
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='JPEG')
-        img_bytes.seek(0)
-        return ("test.jpg", img_bytes, "image/jpeg")
-    
-    @patch('api.main.pipeline')
-    def test_predict_endpoint_success(self, mock_pipeline):
+    def test_predict_endpoint_success(self, client, mock_pipeline):
         """Test réussi de l'endpoint predict"""
         # Setup du mock
         mock_pipeline.predict_image.return_value = self.create_mock_pipeline_result()
         
         # Préparation du fichier de test
-        files = {"file": self.create_test_image_file()}
+        files = {"file": _file_tuple()}
         
         # Test
         response = client.post("/predict", files=files)
@@ -198,46 +229,44 @@ class TestPredictionEndpoints:
             assert "class_name" in result
             assert "ocr" in result
     
-    def test_predict_endpoint_no_pipeline(self):
+    def test_predict_endpoint_no_pipeline(self, client):
         """Test avec pipeline non initialisé"""
         with patch('api.main.pipeline', None):
-            files = {"file": self.create_test_image_file()}
+            files = {"file": _file_tuple()}
             response = client.post("/predict", files=files)
             
             assert response.status_code == 503
             assert "Pipeline ML non initialisé" in response.json()["detail"]
     
-    @patch('api.main.pipeline')
-    def test_predict_endpoint_pipeline_error(self, mock_pipeline):
+    def test_predict_endpoint_pipeline_error(self, client, mock_pipeline):
         """Test avec erreur du pipeline"""
         # Setup du mock pour retourner une erreur
         mock_pipeline.predict_image.return_value = {"error": "Test error"}
         
-        files = {"file": self.create_test_image_file()}
+        files = {"file": _file_tuple()}
         response = client.post("/predict", files=files)
         
         assert response.status_code == 500
         assert "Erreur de prédiction" in response.json()["detail"]
     
-    def test_predict_endpoint_invalid_file(self):
+    def test_predict_endpoint_invalid_file(self, client, mock_pipeline):
         """Test avec fichier invalide"""
         # Fichier texte au lieu d'image
-        files = {"file": ("test.txt", io.StringIO("test content"), "text/plain")}
+        files = {"file": ("test.txt", io.BytesIO(b"test content"), "text/plain")}
         response = client.post("/predict", files=files)
         
         assert response.status_code == 400
         assert "Type de fichier non supporté" in response.json()["detail"]
     
-    @patch('api.main.pipeline')
-    def test_predict_batch_endpoint_success(self, mock_pipeline):
+    def test_predict_batch_endpoint_success(self, client, mock_pipeline):
         """Test réussi de l'endpoint predict batch"""
         # Setup du mock
         mock_pipeline.predict_image.return_value = self.create_mock_pipeline_result()
         
         # Préparation de plusieurs fichiers
         files = [
-            ("files", self.create_test_image_file()),
-            ("files", self.create_test_image_file())
+            ("files", _file_tuple()),
+            ("files", _file_tuple())
         ]
         
         response = client.post("/predict/batch", files=files)
@@ -252,10 +281,10 @@ class TestPredictionEndpoints:
             assert "success" in result
             assert "request_id" in result
     
-    def test_predict_batch_endpoint_too_many_files(self):
+    def test_predict_batch_endpoint_too_many_files(self, client, mock_pipeline):
         """Test avec trop de fichiers en batch"""
-        # Créer plus de 10 fichiers (limite)
-        files = [("files", self.create_test_image_file()) for _ in range(15)]
+        # Plus de 10 fichiers (limite), tous partageant les mêmes octets JPEG
+        files = [("files", _file_tuple())] * 15
         
         response = client.post("/predict/batch", files=files)
         
@@ -266,24 +295,18 @@ class TestPredictionEndpoints:
 class TestPipelineInitialization:
     """Tests pour l'initialisation du pipeline"""
     
-    @patch('api.main.RoadSignInferencePipeline')
-    def test_initialize_pipeline_success(self, mock_pipeline_class):
+    def test_initialize_pipeline_success(self, isolated_pipeline, patched_pipeline_class):
         """Test d'initialisation réussie du pipeline"""
-        # Setup du mock
-        mock_instance = Mock()
-        mock_pipeline_class.return_value = mock_instance
-        
         # Test
         result = initialize_pipeline()
         
         assert result is True
-        mock_pipeline_class.assert_called_once()
+        patched_pipeline_class.assert_called_once()
     
-    @patch('api.main.RoadSignInferencePipeline')
-    def test_initialize_pipeline_failure(self, mock_pipeline_class):
+    def test_initialize_pipeline_failure(self, isolated_pipeline, patched_pipeline_class):
         """Test d'échec d'initialisation du pipeline"""
         # Setup du mock pour lever une exception
-        mock_pipeline_class.side_effect = Exception("Test error")
+        patched_pipeline_class.side_effect = Exception("Test error")
         
         # Test
         result = initialize_pipeline()
@@ -294,28 +317,37 @@ class TestPipelineInitialization:
 class TestStatsAndMetrics:
     """Tests pour les statistiques et métriques"""
     
+    @pytest.fixture(autouse=True)
+    def _reset_stats(self):
+        """Restaure les statistiques globales après chaque test"""
+        from api.main import app_stats
+        snap = dict(app_stats)
+        yield
+        app_stats.clear()
+        app_stats.update(snap)
+    
     def test_update_stats(self):
         """Test de mise à jour des statistiques"""
         from api.main import update_stats, app_stats
         
-        # Valeurs initiales
-        initial_predictions = app_stats["total_predictions"]
-        initial_detections = app_stats["total_detections"] 
-        initial_time = app_stats["total_processing_time"]
+        # Valeurs de départ connues
+        app_stats["total_predictions"] = 3
+        app_stats["total_detections"] = 7
+        app_stats["total_processing_time"] = 2.0
         
         # Mise à jour
         update_stats(5, 1.5)
         
         # Vérifications
-        assert app_stats["total_predictions"] == initial_predictions + 1
-        assert app_stats["total_detections"] == initial_detections + 5
-        assert app_stats["total_processing_time"] == initial_time + 1.5
+        assert app_stats["total_predictions"] == 4
+        assert app_stats["total_detections"] == 12
+        assert app_stats["total_processing_time"] == 3.5
     
-    def test_metrics_calculation(self):
+    def test_metrics_calculation(self, client):
         """Test du calcul des métriques moyennes"""
         from api.main import app_stats
         
-        # Reset des stats pour le test
+        # Valeurs exactes pour le test
         app_stats["total_predictions"] = 10
         app_stats["total_processing_time"] = 25.0
         
@@ -325,11 +357,11 @@ class TestStatsAndMetrics:
         expected_avg = 25.0 / 10  # 2.5
         assert data["average_processing_time"] == expected_avg
     
-    def test_metrics_no_predictions(self):
+    def test_metrics_no_predictions(self, client):
         """Test des métriques sans prédictions"""
         from api.main import app_stats
         
-        # Reset des stats
+        # Aucune prédiction enregistrée
         app_stats["total_predictions"] = 0
         app_stats["total_processing_time"] = 0.0
         
@@ -342,11 +374,9 @@ class TestStatsAndMetrics:
 class TestAPIIntegration:
     """Tests d'intégration de l'API"""
     
-    @patch('api.main.RoadSignInferencePipeline')
-    def test_full_prediction_workflow(self, mock_pipeline_class):
+    def test_full_prediction_workflow(self, isolated_pipeline, patched_pipeline_class, client, mock_pipeline):
         """Test du workflow complet de prédiction"""
         # Setup du pipeline mock
-        mock_pipeline = Mock()
         mock_pipeline.predict_image.return_value = {
             'image_shape': [100, 100, 3],
             'detections_count': 1,
@@ -361,7 +391,7 @@ class TestAPIIntegration:
             'processing_time': 0.3,
             'pipeline_version': '1.0.0'
         }
-        mock_pipeline_class.return_value = mock_pipeline
+        patched_pipeline_class.return_value = mock_pipeline
         
         # Initialisation forcée du pipeline
         from api.main import initialize_pipeline
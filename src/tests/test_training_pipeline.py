@@ -0,0 +1,603 @@
+"""
+Tests unitaires pour le pipeline d'entraînement
+"""
+
+import pytest
+import queue
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock, patch
+import torch
+import yaml
+
+from ml_pipelines import training_pipeline
+from ml_pipelines.training_pipeline import (
+    GTSRB_CLASS_NAMES,
+    OCRTrainingPipeline,
+    YOLOTrainingPipeline,
+    _f1_score,
+)
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / "conf" / "base" / "model_config.yml"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patched_externals():
+    """MLflow et YOLO mockés une seule fois pour tout le module"""
+    with patch('ml_pipelines.training_pipeline.mlflow') as mock_mlflow, \
+         patch('ml_pipelines.training_pipeline.MlflowClient') as mock_client, \
+         patch('ml_pipelines.training_pipeline.YOLO') as mock_yolo_class:
+        yield SimpleNamespace(mlflow=mock_mlflow, MlflowClient=mock_client, YOLO=mock_yolo_class)
+
+
+@pytest.fixture(autouse=True)
+def _reset_externals(_patched_externals):
+    """Repart de mocks vierges à chaque test (appels, valeurs de retour, exceptions)"""
+    for mock in vars(_patched_externals).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Répertoire de travail isolé avec l'arborescence data/ attendue par le pipeline"""
+    (tmp_path / "data" / "02_processed" / "train" / "images").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def pipeline(workdir):
+    """Pipeline YOLO sur la configuration du dépôt"""
+    yolo_pipeline = YOLOTrainingPipeline(str(CONFIG_PATH))
+    yield yolo_pipeline
+    yolo_pipeline.__del__()
+
+
+@pytest.fixture
+def no_gpu(monkeypatch):
+    """Machine sans GPU"""
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False)
+
+
+def _gpus(monkeypatch, count):
+    """Simule `count` GPU CUDA visibles"""
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: count > 0)
+    monkeypatch.setattr(torch.cuda, "device_count", lambda: count)
+
+
+def _fake_psutil(available):
+    """Substitut de psutil dont virtual_memory() rapporte `available` octets libres"""
+    return SimpleNamespace(virtual_memory=lambda: SimpleNamespace(available=available))
+
+
+class TestHelpers:
+    """Tests des fonctions utilitaires du module"""
+    
+    def test_f1_score(self):
+        assert _f1_score(0.5, 0.5) == pytest.approx(0.5)
+        assert _f1_score(0.8, 0.0) == 0.0
+        
+    def test_stop_test_image_read_only(self):
+        image = training_pipeline._stop_test_image()
+        assert image.shape == (100, 300, 3)
+        assert not image.flags.writeable
+        assert training_pipeline._stop_test_image() is image
+        
+    def test_log_batch_uses_active_run(self, _patched_externals):
+        _patched_externals.mlflow.active_run.return_value.info.run_id = "run-1"
+        
+        training_pipeline._log_batch(metrics={"map50": 1}, params={"epochs": 3})
+        
+        kwargs = _patched_externals.MlflowClient.return_value.log_batch.call_args.kwargs
+        assert kwargs['run_id'] == "run-1"
+        assert [(m.key, m.value) for m in kwargs['metrics']] == [("map50", 1.0)]
+        assert [(p.key, p.value) for p in kwargs['params']] == [("epochs", "3")]
+
+
+class TestHardwareSettings:
+    """Tests du choix device / workers / batch selon le matériel"""
+    
+    def test_cpu(self, pipeline, monkeypatch):
+        _gpus(monkeypatch, 0)
+        monkeypatch.setattr(training_pipeline.os, "cpu_count", lambda: 4)
+        
+        device, workers, batch = pipeline._hardware_settings({'batch_size': 16, 'workers': 8})
+        
+        assert device == 'cpu'
+        assert workers == 4
+        assert batch == 16
+        
+    def test_single_gpu_auto_batch(self, pipeline, monkeypatch):
+        _gpus(monkeypatch, 1)
+        monkeypatch.setattr(training_pipeline.os, "cpu_count", lambda: 32)
+        
+        device, workers, batch = pipeline._hardware_settings({'batch_size': "auto", 'workers': 8})
+        
+        assert device == 0
+        assert workers == 8  # Borné par la configuration
+        assert batch == -1
+        
+    def test_multi_gpu(self, pipeline, monkeypatch):
+        _gpus(monkeypatch, 4)
+        monkeypatch.setattr(training_pipeline.os, "cpu_count", lambda: 16)
+        
+        device, workers, batch = pipeline._hardware_settings({'batch_size': 32})
+        
+        assert device == [0, 1, 2, 3]
+        assert workers == 4  # 16 CPU répartis sur 4 GPU
+        assert batch == 32
+        
+    def test_multi_gpu_auto_batch_falls_back(self, pipeline, monkeypatch):
+        _gpus(monkeypatch, 2)
+        monkeypatch.setattr(training_pipeline.os, "cpu_count", lambda: 2)
+        
+        device, workers, batch = pipeline._hardware_settings({'batch_size': -1, 'workers': 8})
+        
+        assert device == [0, 1]
+        assert workers == 2  # Minimum de 2 workers par GPU
+        assert batch == 16
+        
+    def test_unknown_cpu_count(self, pipeline, monkeypatch):
+        _gpus(monkeypatch, 0)
+        monkeypatch.setattr(training_pipeline.os, "cpu_count", lambda: None)
+        
+        _, workers, _ = pipeline._hardware_settings({'batch_size': None})
+        
+        assert workers == 2
+
+
+class TestCacheMode:
+    """Tests du passage du cache RAM au cache disque"""
+    
+    @pytest.fixture
+    def train_images(self, workdir):
+        """Deux images d'entraînement: 2 x 640 x 640 x 3 octets estimés"""
+        images_dir = workdir / "data" / "02_processed" / "train" / "images"
+        for i in range(2):
+            (images_dir / f"img_{i}.jpg").write_bytes(b"")
+        return 2 * 640 * 640 * 3
+        
+    def test_enough_ram_keeps_ram(self, pipeline, train_images, monkeypatch):
+        monkeypatch.setattr(training_pipeline, "psutil", _fake_psutil(train_images + 1))
+        assert pipeline._select_cache_mode("ram", 640) == "ram"
+        
+    def test_low_ram_falls_back_to_disk(self, pipeline, train_images, monkeypatch):
+        monkeypatch.setattr(training_pipeline, "psutil", _fake_psutil(train_images - 1))
+        assert pipeline._select_cache_mode("ram", 640) == "disk"
+        
+    def test_missing_train_dir(self, pipeline, workdir, monkeypatch):
+        (workdir / "data" / "02_processed" / "train" / "images").rmdir()
+        monkeypatch.setattr(training_pipeline, "psutil", _fake_psutil(0))
+        assert pipeline._select_cache_mode("ram", 640) == "ram"
+        
+    def test_without_psutil(self, pipeline, train_images, monkeypatch):
+        monkeypatch.setattr(training_pipeline, "psutil", None)
+        assert pipeline._select_cache_mode("ram", 640) == "ram"
+        
+    @pytest.mark.parametrize("mode", ["disk", ""])
+    def test_other_modes_unchanged(self, pipeline, train_images, monkeypatch, mode):
+        monkeypatch.setattr(training_pipeline, "psutil", _fake_psutil(0))
+        assert pipeline._select_cache_mode(mode, 640) == mode
+
+
+class TestTrainerCallbacks:
+    """Tests des callbacks Ultralytics (channels_last, optimiseur apex)"""
+    
+    @pytest.fixture
+    def fused(self, monkeypatch):
+        """Optimiseurs apex mockés"""
+        fused_adam, fused_sgd = Mock(name="FusedAdam"), Mock(name="FusedSGD")
+        monkeypatch.setattr(training_pipeline, "FusedAdam", fused_adam)
+        monkeypatch.setattr(training_pipeline, "FusedSGD", fused_sgd)
+        return SimpleNamespace(adam=fused_adam, sgd=fused_sgd)
+        
+    @staticmethod
+    def _trainer(optimizer, start_epoch=0):
+        return SimpleNamespace(
+            optimizer=optimizer, start_epoch=start_epoch,
+            _setup_scheduler=Mock(), scheduler=SimpleNamespace(last_epoch=None)
+        )
+        
+    @staticmethod
+    def _params():
+        return [torch.nn.Parameter(torch.zeros(2))]
+        
+    def test_adamw_replaced(self, fused):
+        optimizer = torch.optim.AdamW(self._params(), lr=0.01, weight_decay=0.05)
+        trainer = self._trainer(optimizer)
+        
+        YOLOTrainingPipeline._use_fused_optimizer(trainer)
+        
+        assert trainer.optimizer is fused.adam.return_value
+        groups = fused.adam.call_args.args[0]
+        assert groups[0]['params'] == optimizer.param_groups[0]['params']
+        assert groups[0]['weight_decay'] == 0.05
+        assert fused.adam.call_args.kwargs['adam_w_mode'] is True
+        trainer._setup_scheduler.assert_called_once()
+        assert trainer.scheduler.last_epoch == -1
+        
+    def test_adam_not_adamw_mode(self, fused):
+        trainer = self._trainer(torch.optim.Adam(self._params(), lr=0.01))
+        
+        YOLOTrainingPipeline._use_fused_optimizer(trainer)
+        
+        assert fused.adam.call_args.kwargs['adam_w_mode'] is False
+        
+    def test_sgd_replaced(self, fused):
+        trainer = self._trainer(torch.optim.SGD(self._params(), lr=0.01, momentum=0.9, nesterov=True))
+        
+        YOLOTrainingPipeline._use_fused_optimizer(trainer)
+        
+        assert trainer.optimizer is fused.sgd.return_value
+        assert fused.sgd.call_args.kwargs == {'lr': 0.01, 'momentum': 0.9, 'nesterov': True}
+        fused.adam.assert_not_called()
+        
+    def test_resumed_training_keeps_optimizer(self, fused):
+        optimizer = torch.optim.SGD(self._params(), lr=0.01)
+        trainer = self._trainer(optimizer, start_epoch=5)
+        
+        YOLOTrainingPipeline._use_fused_optimizer(trainer)
+        
+        assert trainer.optimizer is optimizer
+        trainer._setup_scheduler.assert_not_called()
+        
+    def test_unsupported_optimizer_kept(self, fused):
+        optimizer = torch.optim.RMSprop(self._params(), lr=0.01)
+        trainer = self._trainer(optimizer)
+        
+        YOLOTrainingPipeline._use_fused_optimizer(trainer)
+        
+        assert trainer.optimizer is optimizer
+        fused.adam.assert_not_called()
+        fused.sgd.assert_not_called()
+        
+    def test_to_channels_last(self):
+        trainer = SimpleNamespace(model=Mock())
+        
+        YOLOTrainingPipeline._to_channels_last(trainer)
+        
+        trainer.model.to.assert_called_once_with(memory_format=torch.channels_last)
+
+
+class TestAsyncLogging:
+    """Tests de la file de logging MLflow"""
+    
+    def test_worker_drains_queue_despite_failures(self):
+        log_queue = queue.Queue()
+        worker = threading.Thread(target=YOLOTrainingPipeline._log_worker, args=(log_queue,))
+        worker.start()
+        
+        ok = Mock()
+        log_queue.put((Mock(side_effect=RuntimeError("mlflow down")), (), {}))
+        log_queue.put((ok, (1,), {'key': 'value'}))
+        
+        # join() ne rend la main que si task_done() suit aussi la tâche en échec
+        log_queue.join()
+        ok.assert_called_once_with(1, key='value')
+        
+        log_queue.put(None)
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+        assert log_queue.unfinished_tasks == 0
+        
+    def test_log_async_runs_on_worker_thread(self, pipeline):
+        threads = []
+        func = Mock(side_effect=lambda *args, **kwargs: threads.append(threading.current_thread()))
+        
+        pipeline._log_async(func, "run-1", metrics={"map50": 0.5})
+        pipeline._log_queue.join()
+        
+        func.assert_called_once_with("run-1", metrics={"map50": 0.5})
+        assert threads[0] is not threading.current_thread()
+        
+    def test_del_stops_worker(self, workdir):
+        yolo_pipeline = YOLOTrainingPipeline(str(CONFIG_PATH))
+        log_queue = yolo_pipeline._log_queue
+        
+        yolo_pipeline.__del__()
+        
+        log_queue.join()
+        assert log_queue.empty()
+
+
+class TestYOLOTrainingPipeline:
+    """Tests de la préparation, de l'entraînement et de la validation YOLO"""
+    
+    def test_load_config_missing(self, workdir):
+        with pytest.raises(FileNotFoundError):
+            YOLOTrainingPipeline(str(workdir / "absent.yml"))
+            
+    def test_prepare_dataset_config(self, pipeline, workdir):
+        path = pipeline.prepare_dataset_config()
+        
+        with open(path) as f:
+            dataset_config = yaml.safe_load(f)
+        assert Path(path) == Path('data/02_processed/dataset.yaml')
+        assert dataset_config['nc'] == pipeline.data_config['dataset']['classes']
+        assert dataset_config['names'] == list(GTSRB_CLASS_NAMES)
+        assert dataset_config['path'] == str(workdir / 'data' / '02_processed')
+        
+    @pytest.mark.parametrize("pretrained,suffix", [(True, ".pt"), (False, ".yaml")])
+    def test_initialize_model(self, pipeline, _patched_externals, pretrained, suffix):
+        pipeline.yolo_config['model']['pretrained'] = pretrained
+        
+        model = pipeline.initialize_model()
+        
+        assert model is _patched_externals.YOLO.return_value
+        _patched_externals.YOLO.assert_called_once_with(f"yolov8n{suffix}")
+        
+    def test_extract_metrics(self, pipeline):
+        results = SimpleNamespace(results_dict={
+            'metrics/mAP50(B)': 0.9, 'metrics/precision(B)': 0.8, 'metrics/recall(B)': 0.6
+        })
+        
+        metrics = pipeline._extract_training_metrics(results)
+        
+        assert metrics['map50'] == pytest.approx(0.9)
+        assert metrics['map50_95'] == 0.0
+        assert metrics['f1_score'] == pytest.approx(2 * 0.8 * 0.6 / 1.4)
+        
+    def test_extract_metrics_from_model(self, pipeline):
+        pipeline.model = SimpleNamespace(metrics={'metrics/recall(B)': 0.5})
+        
+        metrics = pipeline._extract_training_metrics(object())
+        
+        assert metrics['recall'] == pytest.approx(0.5)
+        assert 'f1_score' not in metrics
+        
+    def test_extract_metrics_failure(self, pipeline):
+        pipeline.model = None
+        
+        metrics = pipeline._extract_training_metrics(object())
+        
+        assert set(metrics.values()) == {0.0}
+        
+    def test_save_model(self, pipeline, workdir, no_gpu):
+        exported = workdir / "weights.onnx"
+        exported.write_bytes(b"onnx")
+        pipeline.model = Mock()
+        pipeline.model.export.return_value = str(exported)
+        
+        model_path = Path(pipeline._save_model())
+        
+        pipeline.model.save.assert_called_once_with(str(model_path))
+        assert pipeline.model.export.call_args.kwargs['half'] is False
+        # Pas de simplification: elle installerait onnxslim à l'exécution
+        assert pipeline.model.export.call_args.kwargs['simplify'] is False
+        assert model_path.parent == Path("data/04_models")
+        assert model_path.with_suffix(".onnx").read_bytes() == b"onnx"
+        assert not exported.exists()
+        
+    def test_log_training_plots(self, pipeline, workdir, _patched_externals):
+        run_dir = workdir / "runs" / "detect" / "train"
+        run_dir.mkdir(parents=True)
+        (run_dir / "results.png").write_bytes(b"")
+        (run_dir / "notes.txt").write_bytes(b"")
+        
+        pipeline._log_training_plots("run-1")
+        
+        _patched_externals.MlflowClient.return_value.log_artifact.assert_called_once_with(
+            "run-1", str(Path("runs/detect/train/results.png")), "training_plots"
+        )
+        
+    def test_log_training_plots_failure(self, pipeline, workdir, _patched_externals):
+        (workdir / "runs" / "detect").mkdir(parents=True)
+        
+        # Aucun run: max() sur une séquence vide, l'erreur est seulement journalisée
+        pipeline._log_training_plots("run-1")
+        
+        _patched_externals.MlflowClient.return_value.log_artifact.assert_not_called()
+        
+    def test_validate_requires_model(self, pipeline):
+        with pytest.raises(ValueError):
+            pipeline.validate_model()
+            
+    def test_validate_model(self, pipeline):
+        pipeline.model = Mock()
+        pipeline.model.val.return_value = SimpleNamespace(results_dict={'metrics/mAP50(B)': 0.7})
+        
+        metrics = pipeline.validate_model()
+        
+        assert metrics['map50'] == pytest.approx(0.7)
+
+
+class TestTrainModel:
+    """Tests de bout en bout de train_model, YOLO et MLflow mockés"""
+    
+    @pytest.fixture
+    def model(self, workdir, _patched_externals):
+        """Modèle YOLO mocké dont l'export ONNX produit un vrai fichier"""
+        exported = workdir / "weights.onnx"
+        exported.write_bytes(b"onnx")
+        model = _patched_externals.YOLO.return_value
+        model.export.return_value = str(exported)
+        model.train.return_value = SimpleNamespace(results_dict={
+            'metrics/mAP50(B)': 0.9, 'metrics/precision(B)': 0.8, 'metrics/recall(B)': 0.7
+        })
+        return model
+        
+    @staticmethod
+    def _logged_params(_patched_externals):
+        """Paramètres envoyés à MLflow par le thread de logging"""
+        calls = _patched_externals.MlflowClient.return_value.log_batch.call_args_list
+        return {p.key: p.value for call in calls for p in call.kwargs['params']}
+        
+    def test_cpu_training(self, pipeline, model, no_gpu, monkeypatch, _patched_externals):
+        monkeypatch.setattr(training_pipeline, "psutil", None)
+        
+        metrics = pipeline.train_model(compile_model=True)
+        
+        kwargs = model.train.call_args.kwargs
+        assert kwargs['device'] == 'cpu'
+        assert kwargs['batch'] == 16
+        assert kwargs['cache'] == "ram"
+        assert 'compile' not in kwargs
+        model.add_callback.assert_not_called()
+        assert metrics['map50'] == pytest.approx(0.9)
+        
+        # La file de logging est vidée avant la clôture du run
+        assert pipeline._log_queue.unfinished_tasks == 0
+        params = self._logged_params(_patched_externals)
+        assert params['compile'] == "False"
+        assert params['memory_format'] == "contiguous"
+        assert params['fused_optimizer'] == "False"
+        _patched_externals.MlflowClient.return_value.log_artifact.assert_called_once()
+        
+    def test_gpu_training(self, pipeline, model, monkeypatch, _patched_externals):
+        _gpus(monkeypatch, 1)
+        monkeypatch.setattr(training_pipeline, "FusedAdam", Mock())
+        monkeypatch.setattr(training_pipeline, "psutil", _fake_psutil(0))
+        monkeypatch.setenv("TORCHINDUCTOR_CACHE_DIR", "/tmp/inductor")
+        monkeypatch.setattr(torch.backends.cudnn, "benchmark", False)
+        monkeypatch.setattr(torch.backends.cudnn, "allow_tf32", False)
+        monkeypatch.setattr(torch.backends.cuda.matmul, "allow_tf32", False)
+        monkeypatch.setattr(torch, "set_float32_matmul_precision", Mock())
+        
+        pipeline.train_model(cache_mode="disk")
+        
+        kwargs = model.train.call_args.kwargs
+        assert kwargs['device'] == 0
+        assert kwargs['cache'] == "disk"
+        assert kwargs.get('compile', False) is ("compile" in training_pipeline.DEFAULT_CFG_DICT)
+        assert torch.backends.cudnn.benchmark is True
+        torch.set_float32_matmul_precision.assert_called_once_with('high')
+        callbacks = [call.args for call in model.add_callback.call_args_list]
+        assert callbacks == [
+            ("on_train_start", pipeline._to_channels_last),
+            ("on_train_start", pipeline._use_fused_optimizer),
+        ]
+        params = self._logged_params(_patched_externals)
+        assert params['memory_format'] == "channels_last"
+        assert params['fused_optimizer'] == "True"
+        assert model.export.call_args.kwargs['half'] is True
+        
+    def test_training_failure(self, pipeline, model, no_gpu, _patched_externals):
+        model.train.side_effect = RuntimeError("CUDA out of memory")
+        
+        with pytest.raises(RuntimeError):
+            pipeline.train_model(cache_mode="")
+            
+        _patched_externals.mlflow.log_param.assert_called_once_with(
+            "error_message", "CUDA out of memory"
+        )
+        assert pipeline._log_queue.unfinished_tasks == 0
+
+
+class TestOCRTrainingPipeline:
+    """Tests de la configuration et de l'optimisation OCR"""
+    
+    @pytest.fixture
+    def ocr_pipeline(self, monkeypatch):
+        """Pipeline OCR sans tesserocr (chemin pytesseract)"""
+        monkeypatch.setattr(training_pipeline, "tesserocr", None)
+        return OCRTrainingPipeline(str(CONFIG_PATH))
+        
+    def test_load_config_missing(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            OCRTrainingPipeline(str(tmp_path / "absent.yml"))
+            
+    def test_setup_tesseract_pytesseract(self, ocr_pipeline, monkeypatch, _patched_externals):
+        monkeypatch.setattr("pytesseract.get_tesseract_version", lambda: "5.3.0")
+        monkeypatch.setattr("pytesseract.image_to_string", Mock(return_value=" stop\n"))
+        
+        assert ocr_pipeline.setup_tesseract() is True
+        
+        _patched_externals.mlflow.log_param.assert_any_call("tesseract_version", "5.3.0")
+        _patched_externals.mlflow.log_metric.assert_called_once_with("test_accuracy", 1.0)
+        
+    def test_setup_tesseract_failure(self, ocr_pipeline, monkeypatch, _patched_externals):
+        monkeypatch.setattr(
+            "pytesseract.get_tesseract_version", Mock(side_effect=OSError("tesseract absent"))
+        )
+        
+        assert ocr_pipeline.setup_tesseract() is False
+        
+        _patched_externals.mlflow.log_param.assert_called_once_with(
+            "error_message", "tesseract absent"
+        )
+        
+    def test_ocr_accuracy_failure(self, ocr_pipeline, monkeypatch):
+        monkeypatch.setattr(
+            "pytesseract.image_to_string", Mock(side_effect=RuntimeError("crash"))
+        )
+        
+        assert ocr_pipeline._test_ocr_accuracy() == 0.0
+        
+    def test_setup_tesseract_tesserocr(self, monkeypatch, _patched_externals):
+        api = MagicMock()
+        api.GetUTF8Text.return_value = "STOP\n"
+        fake_tesserocr = SimpleNamespace(
+            PyTessBaseAPI=Mock(return_value=api), tesseract_version=lambda: "tesserocr 5"
+        )
+        monkeypatch.setattr(training_pipeline, "tesserocr", fake_tesserocr)
+        ocr_pipeline = OCRTrainingPipeline(str(CONFIG_PATH))
+        
+        assert ocr_pipeline.setup_tesseract() is True
+        assert ocr_pipeline.setup_tesseract() is True
+        
+        # Moteur créé une seule fois (--psm / --oem de la config) puis réutilisé,
+        # libéré avec le pipeline
+        fake_tesserocr.PyTessBaseAPI.assert_called_once_with(lang="eng+fra+deu", psm=6, oem=3)
+        _patched_externals.mlflow.log_metric.assert_called_with("test_accuracy", 1.0)
+        ocr_pipeline.__del__()
+        api.End.assert_called_once()
+        
+    def test_optimize_preprocessing(self, ocr_pipeline, monkeypatch):
+        log_batch = Mock()
+        monkeypatch.setattr(training_pipeline, "_log_batch", log_batch)
+        
+        result = ocr_pipeline.optimize_preprocessing()
+        
+        assert result['best_score'] == pytest.approx(0.95)
+        assert result['config'] == {"denoise": True, "contrast": 1.5, "brightness": 10}
+        kwargs = log_batch.call_args.kwargs
+        assert kwargs['metrics']['config_1_score'] == pytest.approx(0.85)
+        assert kwargs['params']['best_contrast'] == 1.5
+        
+    @pytest.mark.parametrize("config,expected", [
+        ({"denoise": False, "contrast": 3.0, "brightness": 50}, 0.7),
+        ({"denoise": True, "contrast": 1.0, "brightness": -10}, 0.95),
+        ({"contrast": None}, 0.0),
+    ])
+    def test_preprocessing_config_score(self, ocr_pipeline, config, expected):
+        assert ocr_pipeline._test_preprocessing_config(config) == pytest.approx(expected)
+
+
+class TestMain:
+    """Tests de l'enchaînement du point d'entrée"""
+    
+    @pytest.fixture
+    def pipelines(self, monkeypatch):
+        yolo_class, ocr_class = Mock(), Mock()
+        monkeypatch.setattr(training_pipeline, "YOLOTrainingPipeline", yolo_class)
+        monkeypatch.setattr(training_pipeline, "OCRTrainingPipeline", ocr_class)
+        yolo_class.return_value.train_model.return_value = {'map50': 0.9}
+        yolo_class.return_value.validate_model.return_value = {'map50': 0.8}
+        ocr_class.return_value.optimize_preprocessing.return_value = {'best_score': 0.95}
+        return SimpleNamespace(yolo=yolo_class.return_value, ocr=ocr_class.return_value)
+        
+    def test_main(self, pipelines):
+        pipelines.ocr.setup_tesseract.return_value = True
+        
+        results = training_pipeline.main()
+        
+        assert results == {
+            "yolo_training": {'map50': 0.9},
+            "ocr_optimization": {'best_score': 0.95},
+            "validation": {'map50': 0.8}
+        }
+        
+    def test_main_ocr_setup_failed(self, pipelines):
+        pipelines.ocr.setup_tesseract.return_value = False
+        
+        results = training_pipeline.main()
+        
+        assert results["ocr_optimization"] == {"best_score": 0.0}
+        pipelines.ocr.optimize_preprocessing.assert_not_called()
+        
+    def test_main_propagates_errors(self, pipelines):
+        pipelines.yolo.train_model.side_effect = RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            training_pipeline.main()